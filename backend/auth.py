@@ -1,10 +1,14 @@
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session as DBSession
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 import secrets
 import string
 from datetime import datetime, timedelta
 from backend.database import get_db
 from backend.models import User, Session
+from backend.session_cache import session_cache
+from backend import events
 
 def hash_password(password: str) -> str:
     return f"hashed_{password}"
@@ -16,7 +20,7 @@ def generate_access_code() -> str:
     random_part = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(5))
     return f"idp-{random_part}"
 
-def create_session(user_id: int, db: DBSession = None) -> str:
+async def create_session(user_id: int, db: AsyncSession = None) -> str:
     if not db:
         return secrets.token_urlsafe(32)
     
@@ -29,16 +33,29 @@ def create_session(user_id: int, db: DBSession = None) -> str:
         expires_at=expires_at
     )
     db.add(session)
-    db.commit()
+    await db.commit()
     
     return session_token
 
-def get_current_user(request: Request, db: DBSession = Depends(get_db)) -> User:
+def _user_snapshot(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+async def _user_from_snapshot(snapshot: dict, db: AsyncSession) -> User:
+    # Восстанавливаем пользователя из кэша и привязываем к сессии без SELECT
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+def get_session_token(request: Request):
     session_token = request.cookies.get("session_token")
     if not session_token:
         auth_header = request.headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
             session_token = auth_header.replace("Bearer ", "")
+    return session_token
+
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)) -> User:
+    session_token = get_session_token(request)
     
     if not session_token:
         raise HTTPException(
@@ -46,32 +63,42 @@ def get_current_user(request: Request, db: DBSession = Depends(get_db)) -> User:
             detail="Not authenticated"
         )
     
-    session = db.query(Session).filter(
-        Session.token == session_token,
-        Session.is_active == True,
-        Session.expires_at > datetime.utcnow()
-    ).first()
+    cached = session_cache.get(session_token)
+    if cached is not None:
+        return await _user_from_snapshot(cached, db)
+    
+    generation = session_cache.generation
     
-    if not session:
+    result = await db.execute(
+        select(User, Session.expires_at).join(
+            Session, Session.user_id == User.id
+        ).where(
+            Session.token == session_token,
+            Session.is_active == True,
+            Session.expires_at > datetime.utcnow()
+        )
+    )
+    row = result.first()
+    
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired session"
         )
     
-    user = db.query(User).filter(User.id == session.user_id).first()
+    user, expires_at = row
     
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+    session_cache.put(session_token, _user_snapshot(user), expires_at, generation)
     
     return user
 
-def delete_session(session_token: str, db: DBSession = None):
+async def delete_session(session_token: str, db: AsyncSession = None):
+    if session_token:
+        session_cache.invalidate(session_token)
     if db and session_token:
-        session = db.query(Session).filter(Session.token == session_token).first()
+        session = await db.scalar(select(Session).where(Session.token == session_token))
         if session:
             session.is_active = False
-            db.commit()
+            await events.invalidate_sessions(db, token=session_token)
+            await db.commit()
 
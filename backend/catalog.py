@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import hashlib
+import json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from backend.models import TaskTemplate, CatalogVersion
+from backend.suggest import SuggestIndex
+
+CATALOG_FIELDS = (
+    "id", "category", "skill_name", "level", "goal",
+    "description", "criteria", "duration_weeks", "source",
+)
+
+async def get_catalog_version(db: AsyncSession) -> int:
+    version = await db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1))
+    return version or 0
+
+def bump_catalog_version(db: Session) -> int:
+    """Увеличивает версию каталога шаблонов; коммит остаётся за вызывающим"""
+    row = db.query(CatalogVersion).filter(CatalogVersion.id == 1).with_for_update().first()
+    if not row:
+        row = CatalogVersion(id=1, version=0)
+        db.add(row)
+    row.version = (row.version or 0) + 1
+    return row.version
+
+class CatalogSnapshot:
+    def __init__(self, version: int, body: bytes, suggest_index: SuggestIndex):
+        self.version = version
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        self.suggest_index = suggest_index
+
+class CatalogCache:
+    """Снимок всего каталога шаблонов, построенный один раз на версию"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._snapshot = None
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        version = await get_catalog_version(db)
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            async with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    snapshot = await self._build(db, version)
+                    self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    async def _build(self, db: AsyncSession, version: int) -> CatalogSnapshot:
+        templates = (await db.scalars(select(TaskTemplate).order_by(
+            TaskTemplate.category, TaskTemplate.skill_name, TaskTemplate.level
+        ))).all()
+
+        categories = {}
+        for template in templates:
+            categories.setdefault(template.category, []).append(
+                {field: getattr(template, field) for field in CATALOG_FIELDS}
+            )
+
+        payload = {
+            "version": version,
+            "categories": [
+                {"category": category, "count": len(items), "templates": items}
+                for category, items in categories.items()
+            ],
+        }
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        suggest_entries = [("category", category, category) for category in categories]
+        suggest_entries += [("skill", t.skill_name, t.category) for t in templates]
+
+        return CatalogSnapshot(version, body, SuggestIndex(suggest_entries))
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import select
+import threading
+import time
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from backend.session_cache import session_cache
+
+# memory — только для одного процесса: события доски и сброс кэша сессий не выходят
+# за пределы воркера. Для нескольких воркеров нужен postgres (LISTEN/NOTIFY)
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+# Число воркеров задавайте этой переменной: uvicorn и gunicorn берут её по умолчанию,
+# а флаг --workers в командной строке отсюда не виден
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+EVENTS_CHANNEL = "idp_events"
+# Сброс кэша сессий во всех воркерах (выход, смена пароля и профиля)
+SESSIONS_CHANNEL = "session_invalidations"
+SUBSCRIBER_QUEUE_SIZE = 100
+
+class EventHub:
+    """Локальная рассылка событий подписчикам доски ИПР внутри процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, idp_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(idp_id, {})[queue] = loop
+        return queue
+
+    def unsubscribe(self, idp_id: int, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(idp_id)
+            if queues is not None:
+                queues.pop(queue, None)
+                if not queues:
+                    del self._subscribers[idp_id]
+
+    def deliver(self, idp_id: int, payload: dict):
+        with self._lock:
+            targets = list(self._subscribers.get(idp_id, {}).items())
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, payload)
+            except RuntimeError:
+                # цикл событий уже закрыт
+                self.unsubscribe(idp_id, queue)
+
+def _invalidate_sessions(message: dict):
+    if message.get("token"):
+        session_cache.invalidate(message["token"])
+    if message.get("user_id") is not None:
+        session_cache.invalidate_user(message["user_id"])
+
+def _offer(queue: asyncio.Queue, payload: dict):
+    if queue.full():
+        # Подписчик не успевает: сбрасываем очередь и просим полную синхронизацию
+        while not queue.empty():
+            queue.get_nowait()
+        payload = {"type": "resync"}
+    queue.put_nowait(payload)
+
+class InMemoryBackend:
+    """События доставляются после коммита только подписчикам этого процесса"""
+
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+
+    async def stage(self, db: AsyncSession, idp_id: int, payload: dict):
+        db.info.setdefault("pending_events", []).append((idp_id, payload))
+
+    async def stage_invalidation(self, db: AsyncSession, message: dict):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+class PostgresNotifyBackend:
+    """NOTIFY в транзакции записи; Postgres доставит его всем воркерам только после COMMIT"""
+
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+        self._running = False
+        self._thread = None
+
+    async def stage(self, db: AsyncSession, idp_id: int, payload: dict):
+        message = json.dumps({"idp_id": idp_id, "payload": payload}, ensure_ascii=False)
+        await db.execute(text("SELECT pg_notify(:channel, :message)"), {
+            "channel": EVENTS_CHANNEL,
+            "message": message
+        })
+
+    async def stage_invalidation(self, db: AsyncSession, message: dict):
+        await db.execute(text("SELECT pg_notify(:channel, :message)"), {
+            "channel": SESSIONS_CHANNEL,
+            "message": json.dumps(message)
+        })
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._listen, name="idp-events-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _listen(self):
+        import psycopg2
+        from backend.database import DATABASE_URL, connect_args
+
+        while self._running:
+            conn = None
+            try:
+                conn = psycopg2.connect(DATABASE_URL, **connect_args)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {EVENTS_CHANNEL}")
+                    cursor.execute(f"LISTEN {SESSIONS_CHANNEL}")
+                while self._running:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        message = json.loads(notify.payload)
+                        if notify.channel == SESSIONS_CHANNEL:
+                            _invalidate_sessions(message)
+                        else:
+                            self.hub.deliver(message["idp_id"], message["payload"])
+            except Exception as e:
+                print(f"⚠ Ошибка слушателя событий: {e}")
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+hub = EventHub()
+
+if EVENTS_BACKEND == "postgres":
+    backend = PostgresNotifyBackend(hub)
+else:
+    backend = InMemoryBackend(hub)
+    if WEB_CONCURRENCY > 1:
+        # Сброс сессии дошёл бы только до своего воркера: без кэша токен проверяется по БД
+        session_cache.disable()
+        print("⚠ EVENTS_BACKEND=memory при нескольких воркерах: кэш сессий выключен")
+
+async def publish(db: AsyncSession, idp_id: int, event_type: str, **data):
+    """Регистрирует событие доски; подписчики получат его только после коммита"""
+    await backend.stage(db, idp_id, {"type": event_type, **data})
+
+async def invalidate_sessions(db: AsyncSession, token: str = None, user_id: int = None):
+    """Сбрасывает кэш сессий: в этом воркере сразу и после COMMIT, в остальных — через NOTIFY.
+    Повторный сброс после COMMIT убирает снимок, прочитанный до фиксации изменения"""
+    message = {"token": token, "user_id": user_id}
+    _invalidate_sessions(message)
+    db.info.setdefault("pending_invalidations", []).append(message)
+    await backend.stage_invalidation(db, message)
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending_events(session):
+    for message in session.info.pop("pending_invalidations", []):
+        _invalidate_sessions(message)
+    for idp_id, payload in session.info.pop("pending_events", []):
+        hub.deliver(idp_id, payload)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_events(session):
+    session.info.pop("pending_events", None)
+    session.info.pop("pending_invalidations", None)
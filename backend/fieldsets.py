@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from typing import List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.orm import load_only
+from backend.models import Task, IDP
+from backend.schemas import TaskResponse, UserResponse, IDPResponse
+
+# Поля задачи, которые можно запросить через fields=; ключевые отдаются всегда
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+TASK_KEY_FIELDS = ("id", "idp_id", "version")
+# Связи ИПР, которые можно запросить через include=
+IDP_RELATIONS = ("mentor", "mentee", "tasks")
+IDP_FIELDS = tuple(field for field in IDPResponse.model_fields if field not in IDP_RELATIONS)
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def parse_task_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """fields=title,status,... -> список полей задачи; None — все поля"""
+    if fields is None:
+        return None
+    requested = _split(fields)
+    unknown = [field for field in requested if field not in TASK_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные поля задачи: {', '.join(unknown)}"
+        )
+    return [field for field in TASK_FIELDS if field in TASK_KEY_FIELDS or field in requested]
+
+def parse_idp_include(include: Optional[str]) -> List[str]:
+    """include=mentor,tasks -> связи ИПР; без параметра — все, пустое значение — ни одной"""
+    if include is None:
+        return list(IDP_RELATIONS)
+    requested = _split(include)
+    unknown = [relation for relation in requested if relation not in IDP_RELATIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные связи ИПР: {', '.join(unknown)}"
+        )
+    return requested
+
+def task_load_only(fields: List[str]):
+    """SELECT только запрошенных колонок задачи"""
+    return load_only(*[getattr(Task, field) for field in fields])
+
+def task_to_dict(task: Task, fields: List[str]) -> dict:
+    # Незагруженные колонки не трогаем: в async-сессии это ленивая загрузка
+    return {field: getattr(task, field) for field in fields}
+
+def idp_to_dict(idp: IDP, include: List[str], task_fields: Optional[List[str]]) -> dict:
+    data = {field: getattr(idp, field) for field in IDP_FIELDS}
+    for relation in ("mentor", "mentee"):
+        if relation in include:
+            data[relation] = UserResponse.from_orm(getattr(idp, relation)).model_dump()
+    if "tasks" in include:
+        data["tasks"] = [
+            task_to_dict(task, task_fields) if task_fields is not None else TaskResponse.from_orm(task).model_dump()
+            for task in idp.tasks
+        ]
+    return data
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Денормализованные счётчики задач ИПР (idps.total_tasks, todo_tasks, ...).
+Их ведут триггеры БД на tasks (миграция 0010) в той же транзакции, что и запись
+задачи, поэтому маршруты о них не заботятся. Просрочка зависит от времени и не
+хранится: она считается при чтении по частичному индексу ix_tasks_idp_open_deadline.
+Сверка на случай ручных правок в обход триггеров: python -m backend.idp_counters
+"""
+import os
+
+from sqlalchemy import func, literal_column, or_, select, update
+from backend.models import IDP, Task, TaskStatus
+
+COUNTERS = ("total_tasks", "todo_tasks", "in_progress_tasks", "done_tasks")
+BATCH_SIZE = int(os.getenv("IDP_COUNTERS_BATCH_SIZE", "500"))
+
+def overdue_tasks():
+    """Коррелированный подзапрос: число просроченных задач ИПР на момент запроса"""
+    # Литерал, а не параметр: только так подготовленный запрос совпадает с условием частичного индекса
+    return select(func.count()).where(
+        Task.idp_id == IDP.id,
+        Task.status != literal_column("'DONE'"),
+        Task.deadline < func.timezone("utc", func.now())
+    ).correlate(IDP).scalar_subquery()
+
+def reconcile_statement(idp_ids):
+    """UPDATE, пересчитывающий счётчики указанных ИПР; затрагивает только разошедшиеся"""
+    counts = select(
+        IDP.id.label("idp_id"),
+        func.count(Task.id).label("total_tasks"),
+        func.count(Task.id).filter(Task.status == TaskStatus.TODO).label("todo_tasks"),
+        func.count(Task.id).filter(Task.status == TaskStatus.IN_PROGRESS).label("in_progress_tasks"),
+        func.count(Task.id).filter(Task.status == TaskStatus.DONE).label("done_tasks")
+    ).outerjoin(
+        Task, Task.idp_id == IDP.id
+    ).where(IDP.id.in_(idp_ids)).group_by(IDP.id).subquery()
+
+    return update(IDP).where(
+        IDP.id == counts.c.idp_id,
+        or_(*[getattr(IDP, name) != counts.c[name] for name in COUNTERS])
+    ).values({name: counts.c[name] for name in COUNTERS}).execution_options(synchronize_session=False)
+
+def reconcile(db) -> int:
+    """Сверка счётчиков всех ИПР пачками; возвращает число исправленных"""
+    fixed = 0
+    after_id = 0
+    while True:
+        # Сначала блокируем строки ИПР: незавершённые записи задач этих ИПР держат ту же
+        # блокировку (её берёт триггер), значит подсчёт ниже увидит их уже закоммиченными,
+        # а новые записи применят свои приращения после нашего коммита
+        idp_ids = db.scalars(
+            select(IDP.id).where(IDP.id > after_id).order_by(IDP.id).limit(BATCH_SIZE).with_for_update()
+        ).all()
+        if not idp_ids:
+            break
+        fixed += db.execute(reconcile_statement(idp_ids)).rowcount
+        db.commit()
+        after_id = idp_ids[-1]
+    return fixed
+
+if __name__ == "__main__":
+    from backend.database import SessionLocal, engine
+
+    db = SessionLocal()
+    try:
+        print(f"✅ Счётчики задач сверены, исправлено ИПР: {reconcile(db)}")
+    finally:
+        db.close()
+        engine.dispose()
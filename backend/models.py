@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, JSON, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, Enum, JSON, Boolean, Index, Sequence, FetchedValue, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 import enum
@@ -34,6 +34,12 @@ class User(Base):
     
     mentored_idps = relationship("IDP", foreign_keys="IDP.mentor_id", back_populates="mentor")
     mentee_idps = relationship("IDP", foreign_keys="IDP.mentee_id", back_populates="mentee")
+    
+    # Вход ментора по email и менти по коду всегда фильтрует ещё и по роли
+    __table_args__ = (
+        Index("ix_users_email_role", "email", "role"),
+        Index("ix_users_access_code_role", "access_code", "role"),
+    )
 
 class IDP(Base):
     __tablename__ = "idps"
@@ -43,10 +49,35 @@ class IDP(Base):
     mentee_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     status = Column(Enum(IDPStatus), default=IDPStatus.ACTIVE)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Счётчики задач и время последней записи ведут триггеры БД на tasks
+    # (backend/idp_counters.py), расхождения исправляет python -m backend.idp_counters
+    total_tasks = Column(Integer, nullable=False, default=0, server_default="0")
+    todo_tasks = Column(Integer, nullable=False, default=0, server_default="0")
+    in_progress_tasks = Column(Integer, nullable=False, default=0, server_default="0")
+    done_tasks = Column(Integer, nullable=False, default=0, server_default="0")
+    last_activity_at = Column(DateTime, default=datetime.utcnow)
+    # Последняя выданная версия изменения задач ИПР; /changes отдаёт её как отметку синхронизации
+    change_version = Column(BigInteger, nullable=False, default=0, server_default="0")
     
     mentor = relationship("User", foreign_keys=[mentor_id], back_populates="mentored_idps")
     mentee = relationship("User", foreign_keys=[mentee_id], back_populates="mentee_idps")
     tasks = relationship("Task", back_populates="idp", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_idps_mentor_status", "mentor_id", "status"),
+        Index("ix_idps_mentee_status", "mentee_id", "status"),
+    )
+
+# Порядок карточек на доске: high, medium, low, без приоритета; внутри — по дате создания.
+# Выражение общее для индекса и запросов, иначе планировщик не сопоставит их
+TASK_PRIORITY_RANK = (
+    "CASE priority WHEN 'high' THEN 0 WHEN 'medium' THEN 1 WHEN 'low' THEN 2 ELSE 3 END"
+)
+
+# Общая последовательность версий изменений задач (вставка, обновление, удаление).
+# Версию выдаёт триггер БД под блокировкой строки ИПР (миграция 0011), поэтому
+# в пределах одного ИПР версии идут в порядке коммитов
+task_change_seq = Sequence("task_change_seq", metadata=Base.metadata)
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -61,21 +92,59 @@ class Task(Base):
     linked_skills = Column(JSON, nullable=True)
     checklist_state = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = Column(BigInteger, nullable=False, server_default=FetchedValue(), server_onupdate=FetchedValue())
     
     idp = relationship("IDP", back_populates="tasks")
     comments = relationship("TaskComment", back_populates="task", cascade="all, delete-orphan")
+    
+    # idp_id — ведущая колонка, отдельный индекс по idp_id не нужен
+    __table_args__ = (
+        Index("ix_tasks_idp_version", "idp_id", "version"),
+        Index(
+            "ix_tasks_board_order",
+            "idp_id", "status", text(f"({TASK_PRIORITY_RANK})"), "created_at", "id"
+        ),
+        # Подсчёт просроченных задач ИПР при чтении
+        Index("ix_tasks_idp_open_deadline", "idp_id", "deadline", postgresql_where=text("status <> 'DONE'")),
+    )
+
+class TaskTombstone(Base):
+    __tablename__ = "task_tombstones"
+    
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    idp_id = Column(Integer, ForeignKey("idps.id", ondelete="CASCADE"), nullable=False)
+    version = Column(BigInteger, nullable=False, server_default=FetchedValue())
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_task_tombstones_idp_version", "idp_id", "version"),
+    )
 
 class Session(Base):
     __tablename__ = "sessions"
     
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, unique=True, index=True, nullable=False)
+    token = Column(String, unique=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     expires_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
     
     user = relationship("User")
+    
+    __table_args__ = (
+        Index("ix_sessions_token_active_expires", "token", "is_active", "expires_at"),
+    )
+
+# Полнотекстовый вектор шаблона. Конфигурация russian стеммит кириллицу,
+# а латинские слова обрабатывает english_stem, поэтому покрывает оба языка.
+TEMPLATE_SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(skill_name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(goal, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C')"
+)
 
 class TaskTemplate(Base):
     __tablename__ = "task_templates"
@@ -90,6 +159,22 @@ class TaskTemplate(Base):
     duration_weeks = Column(Integer, nullable=True)
     source = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # level бывает NULL, а NULL в уникальном индексе не равны друг другу — ключ по coalesce
+        Index(
+            "uq_task_templates_source_key", "source", "category", "skill_name", text("coalesce(level, 0)"),
+            unique=True
+        ),
+        Index("ix_task_templates_search", text(f"({TEMPLATE_SEARCH_VECTOR})"), postgresql_using="gin"),
+    )
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class TaskComment(Base):
     __tablename__ = "task_comments"
@@ -102,5 +187,10 @@ class TaskComment(Base):
     
     task = relationship("Task", back_populates="comments")
     user = relationship("User")
+    
+    # Лента комментариев задачи листается по id (after_id), индекс покрывает и фильтр, и сортировку
+    __table_args__ = (
+        Index("ix_task_comments_task_feed", "task_id", "id"),
+    )
 
 
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.templating import Jinja2Templates
+from backend.responses import etag_matches
+
+# Метка в отрендеренной странице, на место которой подставляется параметр пути
+PLACEHOLDER = "__PAGE_PARAM__"
+SHELL_CACHE_CONTROL = "no-cache"
+HTML_MEDIA_TYPE = "text/html"
+
+class PageShell:
+    """Отрендеренная страница, разрезанная по метке параметра"""
+
+    def __init__(self, body: bytes):
+        self.parts = body.split(PLACEHOLDER.encode("utf-8"))
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+
+    def render(self, param: Optional[str] = None) -> Tuple[bytes, str]:
+        if param is None:
+            return self.parts[0], f'"{self.digest}"'
+        return param.encode("utf-8").join(self.parts), f'"{self.digest}-{param}"'
+
+class ShellCache:
+    """HTML-оболочки страниц: рендер один раз, дальше отдача из памяти с ETag"""
+
+    def __init__(self, templates: Jinja2Templates):
+        self.templates = templates
+        # template -> имя параметра шаблона, который подставляется по метке
+        self.pages: Dict[str, Optional[str]] = {}
+        self._shells: Dict[str, PageShell] = {}
+        self._lock = threading.Lock()
+
+    def register(self, template: str, param: Optional[str] = None):
+        self.pages[template] = param
+
+    def render_all(self):
+        with self._lock:
+            self._shells = {template: self._render(template) for template in self.pages}
+
+    def _render(self, template: str) -> PageShell:
+        param = self.pages[template]
+        context = {param: PLACEHOLDER} if param else {}
+        return PageShell(self.templates.get_template(template).render(**context).encode("utf-8"))
+
+    def _get(self, template: str) -> PageShell:
+        shell = self._shells.get(template)
+        if shell is None:
+            with self._lock:
+                shell = self._shells.get(template)
+                if shell is None:
+                    shell = self._render(template)
+                    self._shells[template] = shell
+        return shell
+
+    def response(self, request: Request, template: str, param=None) -> Response:
+        body, etag = self._get(template).render(None if param is None else str(param))
+        headers = {"ETag": etag, "Cache-Control": SHELL_CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type=HTML_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Верхние границы корзин гистограммы ожидания соединения, в секундах
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class PoolMetrics:
+    """Живые метрики пула соединений: выдачи, переполнение, ожидание, таймауты"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_buckets[bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def bind(self, pool):
+        self.pool = pool
+        pool._metrics = self
+
+    def attach(self, pool):
+        self.bind(pool)
+
+        @event.listens_for(pool, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(pool, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+
+        @event.listens_for(pool, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checkins += 1
+
+        @event.listens_for(pool, "invalidate")
+        def _on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            histogram = {
+                f"le_{bound}": count for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)
+            }
+            histogram["le_inf"] = self.wait_buckets[-1]
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "checkout_timeouts": self.timeouts,
+                "wait_seconds": {
+                    "count": waits,
+                    "sum": round(self.wait_sum, 6),
+                    "max": round(self.wait_max, 6),
+                    "avg": round(self.wait_sum / waits, 6) if waits else 0.0,
+                    "histogram": histogram,
+                },
+            }
+        if self.pool is not None:
+            data.update({
+                "size": self.pool.size(),
+                "checked_out": self.pool.checkedout(),
+                "checked_in": self.pool.checkedin(),
+                "overflow": max(self.pool.overflow(), 0),
+                "max_overflow": self.pool._max_overflow,
+                "timeout": self.pool.timeout(),
+            })
+        return data
+
+class _InstrumentedPoolMixin:
+    """Замеряет ожидание свободного соединения и таймауты выдачи"""
+
+    def _do_get(self):
+        metrics = getattr(self, "_metrics", None)
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if metrics is not None:
+                metrics.record_timeout()
+            raise
+        if metrics is not None:
+            metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # Слушатели событий переходят в новый пул через dispatch, перепривязываем только счётчики
+        pool = super().recreate()
+        metrics = getattr(self, "_metrics", None)
+        if metrics is not None:
+            metrics.bind(pool)
+        return pool
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+from typing import Optional
+from fastapi.responses import ORJSONResponse
+
+class UTF8ORJSONResponse(ORJSONResponse):
+    """JSON через orjson: кириллица пишется как UTF-8 без \\u-экранирования и без повторной сериализации"""
+    media_type = "application/json; charset=utf-8"
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверка заголовка If-None-Match для ответа 304"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
@@ -1,21 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.database import get_db
 from backend.models import User, UserRole
 from backend.schemas import LoginRequest, RegisterRequest, TokenResponse, UserResponse
 from backend.auth import verify_password, create_session, hash_password, delete_session
+from backend import events
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 @router.post("/login", response_model=TokenResponse)
-def login(login_data: LoginRequest, response: Response, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, response: Response, db: AsyncSession = Depends(get_db)):
     user = None
     
     if login_data.email and login_data.password:
-        user = db.query(User).filter(
+        user = await db.scalar(select(User).where(
             User.email == login_data.email,
             User.role == UserRole.MENTOR
-        ).first()
+        ))
         
         if not user or not verify_password(login_data.password, user.password_hash):
             raise HTTPException(
@@ -24,10 +26,10 @@ def login(login_data: LoginRequest, response: Response, db: Session = Depends(ge
             )
     
     elif login_data.access_code:
-        user = db.query(User).filter(
+        user = await db.scalar(select(User).where(
             User.access_code == login_data.access_code,
             User.role == UserRole.MENTEE
-        ).first()
+        ))
         
         if not user:
             raise HTTPException(
@@ -40,7 +42,7 @@ def login(login_data: LoginRequest, response: Response, db: Session = Depends(ge
             detail="Необходимо указать email+password или access_code"
         )
     
-    session_token = create_session(user.id, db)
+    session_token = await create_session(user.id, db)
     
     response.set_cookie(
         key="session_token",
@@ -56,11 +58,11 @@ def login(login_data: LoginRequest, response: Response, db: Session = Depends(ge
     )
 
 @router.post("/register", response_model=UserResponse)
-def register_mentor(
+async def register_mentor(
     register_data: RegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    existing = db.query(User).filter(User.email == register_data.email).first()
+    existing = await db.scalar(select(User).where(User.email == register_data.email))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -76,22 +78,22 @@ def register_mentor(
         grade=register_data.grade
     )
     db.add(mentor)
-    db.commit()
-    db.refresh(mentor)
+    await db.commit()
+    await db.refresh(mentor)
     
     return UserResponse.from_orm(mentor)
 
 @router.patch("/reset-password")
-def reset_password(
+async def reset_password(
     email: str,
     new_password: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Сброс пароля для ментора"""
-    user = db.query(User).filter(
+    user = await db.scalar(select(User).where(
         User.email == email,
         User.role == UserRole.MENTOR
-    ).first()
+    ))
     
     if not user:
         raise HTTPException(
@@ -101,7 +103,8 @@ def reset_password(
     
     # Обновляем пароль
     user.password_hash = hash_password(new_password)
-    db.commit()
+    await events.invalidate_sessions(db, user_id=user.id)
+    await db.commit()
     
     return {"message": "Пароль успешно изменен"}
 
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Optional
 from datetime import datetime
 from backend.database import get_db
 from backend.models import TaskComment, Task, User
 from backend.auth import get_current_user
+from backend import events
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/comments", tags=["Comments"])
@@ -25,12 +28,12 @@ class CommentResponse(BaseModel):
         from_attributes = True
 
 @router.post("/", response_model=CommentResponse)
-def create_comment(
+async def create_comment(
     comment_data: CommentCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    task = db.query(Task).filter(Task.id == comment_data.task_id).first()
+    task = await db.scalar(select(Task).options(joinedload(Task.idp)).where(Task.id == comment_data.task_id))
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -50,8 +53,10 @@ def create_comment(
         comment=comment_data.comment
     )
     db.add(comment)
-    db.commit()
-    db.refresh(comment)
+    await db.flush()
+    await events.publish(db, idp.id, "comment.created", task_id=comment.task_id, comment_id=comment.id)
+    await db.commit()
+    await db.refresh(comment)
     
     return CommentResponse(
         id=comment.id,
@@ -63,12 +68,14 @@ def create_comment(
     )
 
 @router.get("/task/{task_id}", response_model=List[CommentResponse])
-def get_task_comments(
+async def get_task_comments(
     task_id: int,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = await db.scalar(select(Task).options(joinedload(Task.idp)).where(Task.id == task_id))
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -82,36 +89,40 @@ def get_task_comments(
             detail="Нет доступа к этой задаче"
         )
     
-    comments = db.query(TaskComment).filter(
-        TaskComment.task_id == task_id
-    ).order_by(TaskComment.created_at).all()
+    # Имя автора берём тем же запросом; keyset-пагинация по id комментария
+    query = select(TaskComment, User.full_name).outerjoin(
+        User, User.id == TaskComment.user_id
+    ).where(TaskComment.task_id == task_id)
     
-    result = []
-    for comment in comments:
-        user = db.query(User).filter(User.id == comment.user_id).first()
-        result.append(CommentResponse(
+    if after_id is not None:
+        query = query.where(TaskComment.id > after_id)
+    
+    rows = (await db.execute(query.order_by(TaskComment.id).limit(limit))).all()
+    
+    return [
+        CommentResponse(
             id=comment.id,
             task_id=comment.task_id,
             user_id=comment.user_id,
             comment=comment.comment,
             created_at=comment.created_at,
-            user_name=user.full_name if user else "Неизвестно"
-        ))
-    
-    return result
+            user_name=user_name or "Неизвестно"
+        )
+        for comment, user_name in rows
+    ]
 
 class CommentUpdate(BaseModel):
     comment: str
 
 @router.patch("/{comment_id}", response_model=CommentResponse)
-def update_comment(
+async def update_comment(
     comment_id: int,
     comment_data: CommentUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Редактировать комментарий (только автор)"""
-    comment = db.query(TaskComment).filter(TaskComment.id == comment_id).first()
+    comment = await db.scalar(select(TaskComment).options(joinedload(TaskComment.task)).where(TaskComment.id == comment_id))
     if not comment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -126,29 +137,28 @@ def update_comment(
     
     # Обновляем текст комментария
     comment.comment = comment_data.comment
-    db.commit()
-    db.refresh(comment)
-    
-    # Получаем имя пользователя для ответа
-    user = db.query(User).filter(User.id == comment.user_id).first()
+    await events.publish(db, comment.task.idp_id, "comment.updated", task_id=comment.task_id, comment_id=comment.id)
+    await db.commit()
+    await db.refresh(comment)
     
+    # Автор комментария — текущий пользователь
     return CommentResponse(
         id=comment.id,
         task_id=comment.task_id,
         user_id=comment.user_id,
         comment=comment.comment,
         created_at=comment.created_at,
-        user_name=user.full_name if user else "Неизвестно"
+        user_name=current_user.full_name
     )
 
 @router.delete("/{comment_id}")
-def delete_comment(
+async def delete_comment(
     comment_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Удалить комментарий (только автор)"""
-    comment = db.query(TaskComment).filter(TaskComment.id == comment_id).first()
+    comment = await db.scalar(select(TaskComment).options(joinedload(TaskComment.task)).where(TaskComment.id == comment_id))
     if not comment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -161,8 +171,9 @@ def delete_comment(
             detail="Вы можете удалять только свои комментарии"
         )
     
-    db.delete(comment)
-    db.commit()
+    await events.publish(db, comment.task.idp_id, "comment.deleted", task_id=comment.task_id, comment_id=comment.id)
+    await db.delete(comment)
+    await db.commit()
     
     return {"message": "Комментарий удален"}
 
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from backend.database import AsyncSessionLocal
+from backend.models import IDP
+from backend.auth import get_current_user
+from backend.events import hub
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+HEARTBEAT_SECONDS = 15
+
+async def _check_idp_access(request: Request, idp_id: int):
+    # Сессия БД открывается только на время проверки, а не на всё время стрима
+    async with AsyncSessionLocal() as db:
+        current_user = await get_current_user(request, db)
+        idp = await db.get(IDP, idp_id)
+        if not idp:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="ИПР не найден"
+            )
+        if idp.mentor_id != current_user.id and idp.mentee_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Нет доступа к этому ИПР"
+            )
+
+@router.get("/idp/{idp_id}")
+async def stream_idp_events(request: Request, idp_id: int):
+    """Server-Sent Events: изменения задач и комментариев доски ИПР"""
+    await _check_idp_access(request, idp_id)
+    
+    queue = hub.subscribe(idp_id)
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                data = json.dumps(payload, ensure_ascii=False)
+                yield f"event: {payload['type']}\ndata: {data}\n\n"
+        finally:
+            hub.unsubscribe(idp_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
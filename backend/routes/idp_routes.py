@@ -1,27 +1,52 @@
 # -*- coding: utf-8 -*-
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload, aliased
+from sqlalchemy import func, insert, select
+from typing import List, Optional
+from datetime import datetime, timedelta
 from backend.database import get_db
-from backend.models import User, IDP, UserRole, IDPStatus
-from backend.schemas import IDPCreate, IDPResponse, UserResponse
+from backend.models import User, IDP, Task, TaskTemplate, UserRole, IDPStatus, TaskStatus
+from backend.schemas import IDPCreate, IDPCreateFromTemplates, IDPResponse, IDPSummaryResponse, UserResponse
 from backend.auth import get_current_user, generate_access_code, hash_password
+from backend import events
+from backend.idp_counters import overdue_tasks
+from backend.fieldsets import parse_idp_include, parse_task_fields, task_load_only, idp_to_dict
+from backend.responses import UTF8ORJSONResponse
 
 router = APIRouter(prefix="/api/idps", tags=["IDPs"])
 
-@router.post("/", response_model=IDPResponse)
-def create_idp(
-    idp_data: IDPCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def _idp_query(include=None, task_fields=None):
+    # mentor/mentee подтягиваются JOIN'ом, задачи — одним SELECT ... IN для всех ИПР;
+    # include/task_fields сужают загрузку до запрошенных связей и колонок
+    if include is None:
+        include = ("mentor", "mentee", "tasks")
+    options = [joinedload(getattr(IDP, relation)) for relation in ("mentor", "mentee") if relation in include]
+    if "tasks" in include:
+        tasks = selectinload(IDP.tasks)
+        options.append(tasks.options(task_load_only(task_fields)) if task_fields is not None else tasks)
+    return select(IDP).options(*options)
+
+def _sparse(include: Optional[str], fields: Optional[str]):
+    """Разбор include=/fields=; (None, None) — полный ответ по схеме"""
+    if include is None and fields is None:
+        return None, None
+    return parse_idp_include(include), parse_task_fields(fields)
+
+async def _load_idp(db: AsyncSession, idp_id: int, include=None, task_fields=None):
+    # populate_existing: счётчики ИПР, уже лежащего в сессии, могли измениться триггером
+    query = _idp_query(include, task_fields).where(IDP.id == idp_id).execution_options(populate_existing=True)
+    return (await db.scalars(query)).unique().first()
+
+async def _add_idp(idp_data: IDPCreate, current_user: User, db: AsyncSession):
+    """Создаёт (или обновляет) менти и ИПР в текущей транзакции без коммита"""
     if current_user.role != UserRole.MENTOR:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Только менторы могут создавать ИПР"
         )
     
-    existing_mentee = db.query(User).filter(User.email == idp_data.mentee_email).first()
+    existing_mentee = await db.scalar(select(User).where(User.email == idp_data.mentee_email))
     
     if existing_mentee:
         mentee = existing_mentee
@@ -38,11 +63,11 @@ def create_idp(
         if not mentee.access_code:
             mentee.access_code = generate_access_code()
         
-        active_idp = db.query(IDP).filter(
+        active_idp = await db.scalar(select(IDP).where(
             IDP.mentee_id == mentee.id,
             IDP.mentor_id == current_user.id,
             IDP.status == IDPStatus.ACTIVE
-        ).first()
+        ))
         
         if active_idp:
             raise HTTPException(
@@ -60,44 +85,165 @@ def create_idp(
             grade=idp_data.mentee_grade
         )
         db.add(mentee)
-        db.flush()
+        await db.flush()
     
     idp = IDP(
         mentor_id=current_user.id,
         mentee_id=mentee.id
     )
     db.add(idp)
-    db.commit()
-    db.refresh(idp)
+    await db.flush()
     
-    return IDPResponse.from_orm(idp)
+    return idp, existing_mentee is not None
+
+@router.post("/", response_model=IDPResponse)
+async def create_idp(
+    idp_data: IDPCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    idp, mentee_updated = await _add_idp(idp_data, current_user, db)
+    if mentee_updated:
+        await events.invalidate_sessions(db, user_id=idp.mentee_id)
+    await db.commit()
+    
+    return IDPResponse.from_orm(await _load_idp(db, idp.id))
+
+@router.post("/from-templates", response_model=IDPResponse)
+async def create_idp_from_templates(
+    idp_data: IDPCreateFromTemplates,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Создание ИПР вместе с задачами из шаблонов одной транзакцией"""
+    idp, mentee_updated = await _add_idp(idp_data, current_user, db)
+    
+    template_ids = list(dict.fromkeys(idp_data.template_ids))
+    templates = {
+        t.id: t for t in await db.scalars(select(TaskTemplate).where(TaskTemplate.id.in_(template_ids)))
+    } if template_ids else {}
+    
+    missing = [template_id for template_id in template_ids if template_id not in templates]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Шаблоны не найдены: {', '.join(map(str, missing))}"
+        )
+    
+    now = datetime.utcnow()
+    rows = []
+    for template_id in template_ids:
+        template = templates[template_id]
+        deadline = None
+        if idp_data.deadlines_from_duration and template.duration_weeks:
+            deadline = now + timedelta(weeks=template.duration_weeks)
+        
+        description_parts = [template.goal, template.description]
+        if template.criteria:
+            description_parts.append(f"Критерии:\n{template.criteria}")
+        
+        rows.append({
+            "idp_id": idp.id,
+            "title": f"{template.skill_name} (Уровень {template.level or 1})",
+            "description": "\n\n".join(part for part in description_parts if part),
+            "status": TaskStatus.TODO,
+            "priority": "medium",
+            "deadline": deadline,
+            "linked_skills": {
+                "category": template.category,
+                "skill": template.skill_name,
+                "level": template.level
+            },
+            "created_at": now,
+            "updated_at": now
+        })
+    
+    # Один INSERT ... VALUES на все задачи
+    if rows:
+        await db.execute(insert(Task), rows)
+    if mentee_updated:
+        await events.invalidate_sessions(db, user_id=idp.mentee_id)
+    await db.commit()
+    
+    return IDPResponse.from_orm(await _load_idp(db, idp.id))
 
 @router.get("/", response_model=List[IDPResponse])
-def get_my_idps(
+async def get_my_idps(
     include_all: bool = False,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    """include=mentor,mentee,tasks — какие связи отдавать (пусто — ни одной),
+    fields=... — какие поля задач выбирать из БД"""
+    relations, task_fields = _sparse(include, fields)
     if current_user.role == UserRole.MENTOR:
-        query = db.query(IDP).filter(IDP.mentor_id == current_user.id)
+        query = _idp_query(relations, task_fields).where(IDP.mentor_id == current_user.id)
         if not include_all:
-            query = query.filter(IDP.status == IDPStatus.ACTIVE)
-        idps = query.all()
+            query = query.where(IDP.status == IDPStatus.ACTIVE)
+        idps = (await db.scalars(query)).unique().all()
     else:
-        query = db.query(IDP).filter(IDP.mentee_id == current_user.id)
+        query = _idp_query(relations, task_fields).where(IDP.mentee_id == current_user.id)
         if not include_all:
-            query = query.filter(IDP.status == IDPStatus.ACTIVE)
-        idps = query.all()
+            query = query.where(IDP.status == IDPStatus.ACTIVE)
+        idps = (await db.scalars(query)).unique().all()
     
+    if relations is not None:
+        return UTF8ORJSONResponse([idp_to_dict(idp, relations, task_fields) for idp in idps])
     return [IDPResponse.from_orm(idp) for idp in idps]
 
+@router.get("/summary", response_model=List[IDPSummaryResponse])
+async def get_my_idps_summary(
+    include_all: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Сводка по ИПР для дашборда: счётчики задач читаются из колонок ИПР, просрочка — по индексу"""
+    Mentor = aliased(User)
+    Mentee = aliased(User)
+    
+    query = select(
+        IDP.id,
+        IDP.mentor_id,
+        IDP.mentee_id,
+        IDP.status,
+        IDP.created_at,
+        Mentor.full_name.label("mentor_name"),
+        Mentee.full_name.label("mentee_name"),
+        IDP.total_tasks,
+        IDP.todo_tasks,
+        IDP.in_progress_tasks,
+        IDP.done_tasks,
+        overdue_tasks().label("overdue_tasks"),
+        func.coalesce(IDP.last_activity_at, IDP.created_at).label("last_activity_at")
+    ).join(
+        Mentor, Mentor.id == IDP.mentor_id
+    ).join(
+        Mentee, Mentee.id == IDP.mentee_id
+    )
+    
+    if current_user.role == UserRole.MENTOR:
+        query = query.where(IDP.mentor_id == current_user.id)
+    else:
+        query = query.where(IDP.mentee_id == current_user.id)
+    if not include_all:
+        query = query.where(IDP.status == IDPStatus.ACTIVE)
+    
+    rows = (await db.execute(query.order_by(IDP.created_at))).all()
+    
+    return [IDPSummaryResponse(**row._asdict()) for row in rows]
+
 @router.get("/{idp_id}", response_model=IDPResponse)
-def get_idp(
+async def get_idp(
     idp_id: int,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    idp = db.query(IDP).filter(IDP.id == idp_id).first()
+    relations, task_fields = _sparse(include, fields)
+    idp = await _load_idp(db, idp_id, relations, task_fields)
     
     if not idp:
         raise HTTPException(
@@ -111,12 +257,14 @@ def get_idp(
             detail="Нет доступа к этому ИПР"
         )
     
+    if relations is not None:
+        return UTF8ORJSONResponse(idp_to_dict(idp, relations, task_fields))
     return IDPResponse.from_orm(idp)
 
 @router.get("/mentees/list", response_model=List[UserResponse])
-def get_my_mentees(
+async def get_my_mentees(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     if current_user.role != UserRole.MENTOR:
         raise HTTPException(
@@ -124,21 +272,21 @@ def get_my_mentees(
             detail="Доступно только для менторов"
         )
     
-    idps = db.query(IDP).filter(
+    idps = await db.scalars(select(IDP).options(joinedload(IDP.mentee)).where(
         IDP.mentor_id == current_user.id,
         IDP.status == IDPStatus.ACTIVE
-    ).all()
+    ))
     mentees = [idp.mentee for idp in idps]
     
     return [UserResponse.from_orm(mentee) for mentee in mentees]
 
 @router.patch("/{idp_id}/close")
-def close_idp(
+async def close_idp(
     idp_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    idp = db.query(IDP).filter(IDP.id == idp_id).first()
+    idp = await db.get(IDP, idp_id)
     
     if not idp:
         raise HTTPException(
@@ -153,17 +301,17 @@ def close_idp(
         )
     
     idp.status = IDPStatus.COMPLETED
-    db.commit()
+    await db.commit()
     
     return {"message": "ИПР закрыт"}
 
 @router.delete("/{idp_id}")
-def delete_idp(
+async def delete_idp(
     idp_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    idp = db.query(IDP).filter(IDP.id == idp_id).first()
+    idp = await db.get(IDP, idp_id)
     
     if not idp:
         raise HTTPException(
@@ -177,8 +325,8 @@ def delete_idp(
             detail="Только ментор может удалить ИПР"
         )
     
-    db.delete(idp)
-    db.commit()
+    await db.delete(idp)
+    await db.commit()
     
     return {"message": "ИПР удален"}
 
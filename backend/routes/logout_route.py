@@ -1,15 +1,15 @@
 from fastapi import APIRouter, Response, Request, Depends
-from sqlalchemy.orm import Session
-from backend.auth import delete_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.auth import delete_session, get_session_token
 from backend.database import get_db
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 @router.post("/logout")
-def logout(request: Request, response: Response, db: Session = Depends(get_db)):
-    session_token = request.cookies.get("session_token")
+async def logout(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    session_token = get_session_token(request)
     if session_token:
-        delete_session(session_token, db)
+        await delete_session(session_token, db)
     
     response.delete_cookie("session_token")
     
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from backend.auth import get_current_user
+from backend.database import pool_stats
+from backend.models import User, UserRole
+from backend.session_cache import session_cache
+
+async def require_mentor(current_user: User = Depends(get_current_user)) -> User:
+    # Метрики раскрывают нагрузку и число активных сессий — не для анонимов и менти
+    if current_user.role != UserRole.MENTOR:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Доступно только для менторов"
+        )
+    return current_user
+
+router = APIRouter(prefix="/api/metrics", tags=["Metrics"], dependencies=[Depends(require_mentor)])
+
+@router.get("/pool")
+async def get_pool_metrics():
+    """Живые метрики пулов соединений с БД для подбора размера под число воркеров"""
+    return pool_stats()
+
+@router.get("/session-cache")
+async def get_session_cache_metrics():
+    return session_cache.stats()
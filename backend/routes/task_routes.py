@@ -1,20 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select, insert, update, delete, or_, tuple_, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, aliased
+from typing import List, Optional
+from datetime import datetime
 from backend.database import get_db
-from backend.models import User, Task, IDP, UserRole
-from backend.schemas import TaskCreate, TaskUpdate, TaskResponse
+from backend.models import User, Task, TaskTombstone, TaskComment, IDP, UserRole, TaskStatus, TASK_PRIORITY_RANK
+from backend.schemas import (
+    TaskBase, TaskCreate, TaskUpdate, TaskResponse, TaskChangesResponse,
+    TaskBatchRequest, TaskBatchResult, TaskBatchResponse
+)
 from backend.auth import get_current_user
+from backend.fieldsets import parse_task_fields, task_load_only, task_to_dict
+from backend.responses import UTF8ORJSONResponse
+from backend import events
 
 router = APIRouter(prefix="/api/tasks", tags=["Tasks"])
 
 @router.post("/", response_model=TaskResponse)
-def create_task(
+async def create_task(
     task_data: TaskCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    idp = db.query(IDP).filter(IDP.id == task_data.idp_id).first()
+    idp = await db.get(IDP, task_data.idp_id)
     if not idp:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,18 +38,153 @@ def create_task(
     
     task = Task(**task_data.dict())
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    await db.flush()
+    await events.publish(db, task.idp_id, "task.created", task_id=task.id)
+    await db.commit()
+    await db.refresh(task)
     
     return TaskResponse.from_orm(task)
 
+@router.post("/batch", response_model=TaskBatchResponse)
+async def batch_tasks(
+    batch: TaskBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Пакет операций над задачами одного ИПР: доступ проверяется один раз, всё в одной транзакции"""
+    idp = await db.get(IDP, batch.idp_id)
+    if not idp:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="ИПР не найден"
+        )
+    
+    if idp.mentor_id != current_user.id and idp.mentee_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа к этому ИПР"
+        )
+    
+    results = [None] * len(batch.operations)
+    
+    def fail(index, operation, detail):
+        results[index] = TaskBatchResult(
+            index=index, op=operation.op, ok=False, task_id=operation.task_id, detail=detail
+        )
+    
+    referenced_ids = {
+        operation.task_id for operation in batch.operations
+        if operation.op != "create" and operation.task_id is not None
+    }
+    # id -> версия до изменений. Строки заблокированы до коммита,
+    # поэтому сверка версии ниже не пропустит параллельную запись
+    existing = {}
+    if referenced_ids:
+        rows = await db.execute(select(Task.id, Task.version).where(
+            Task.idp_id == idp.id,
+            Task.id.in_(referenced_ids)
+        ).with_for_update())
+        existing = {row.id: row.version for row in rows}
+    
+    now = datetime.utcnow()
+    creates, updates, deletes = [], [], []
+    touched_ids = set()
+    for index, operation in enumerate(batch.operations):
+        values = operation.data.dict(exclude_unset=True, exclude={"version"}) if operation.data else {}
+        
+        if operation.op == "create":
+            values = {field: value for field, value in values.items() if value is not None}
+            if not values.get("title"):
+                fail(index, operation, "Не указано название задачи")
+                continue
+            row = TaskBase(**values).dict()
+            row.update(idp_id=idp.id, created_at=now, updated_at=now)
+            creates.append((index, row))
+        elif operation.task_id is None:
+            fail(index, operation, "Не указан task_id")
+        elif operation.task_id not in existing:
+            fail(index, operation, "Задача не найдена")
+        elif operation.task_id in touched_ids:
+            fail(index, operation, "Задача встречается в пакете несколько раз")
+        elif operation.data and operation.data.version is not None \
+                and operation.data.version != existing[operation.task_id]:
+            fail(index, operation, "Задачу уже изменил другой участник, обновите доску")
+        elif operation.op == "delete":
+            if idp.mentor_id != current_user.id:
+                fail(index, operation, "Только ментор может удалять задачи")
+                continue
+            touched_ids.add(operation.task_id)
+            deletes.append((index, operation.task_id))
+        else:
+            if not values:
+                fail(index, operation, "Нет изменений")
+                continue
+            touched_ids.add(operation.task_id)
+            updates.append((index, operation.task_id, values))
+    
+    if deletes:
+        deleted_ids = [task_id for _, task_id in deletes]
+        await db.execute(insert(TaskTombstone), [
+            {"task_id": task_id, "idp_id": idp.id, "deleted_at": now} for task_id in deleted_ids
+        ])
+        await db.execute(delete(TaskComment).where(TaskComment.task_id.in_(deleted_ids)))
+        await db.execute(delete(Task).where(Task.id.in_(deleted_ids)))
+        for index, task_id in deletes:
+            results[index] = TaskBatchResult(index=index, op="delete", ok=True, task_id=task_id)
+    
+    if updates:
+        # UPDATE по первичному ключу одним executemany на каждый набор полей
+        await db.execute(update(Task), [{"id": task_id, **values} for _, task_id, values in updates])
+        updated = {
+            task.id: task for task in await db.scalars(
+                select(Task).where(Task.id.in_([task_id for _, task_id, _ in updates]))
+                .execution_options(populate_existing=True)
+            )
+        }
+        for index, task_id, _ in updates:
+            results[index] = TaskBatchResult(
+                index=index, op="update", ok=True, task_id=task_id,
+                task=TaskResponse.from_orm(updated[task_id])
+            )
+    
+    if creates:
+        created = (await db.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=True),
+            [row for _, row in creates]
+        )).all()
+        for (index, _), task in zip(creates, created):
+            results[index] = TaskBatchResult(
+                index=index, op="create", ok=True, task_id=task.id, task=TaskResponse.from_orm(task)
+            )
+    
+    if creates or updates or deletes:
+        await events.publish(
+            db, idp.id, "tasks.batch",
+            created=[result.task_id for result in results if result.ok and result.op == "create"],
+            updated=[task_id for _, task_id, _ in updates],
+            deleted=[task_id for _, task_id in deletes]
+        )
+        await db.commit()
+    
+    return TaskBatchResponse(results=results)
+
 @router.get("/idp/{idp_id}", response_model=List[TaskResponse])
-def get_tasks_by_idp(
+async def get_tasks_by_idp(
     idp_id: int,
+    status_filter: Optional[TaskStatus] = Query(None, alias="status"),
+    priority: Optional[List[str]] = Query(None),
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    idp = db.query(IDP).filter(IDP.id == idp_id).first()
+    """Задачи ИПР в порядке доски; колонку можно листать по after_id (последняя полученная задача).
+    fields=title,status,... — выбрать из БД и отдать только эти поля"""
+    task_fields = parse_task_fields(fields)
+    idp = await db.get(IDP, idp_id)
     if not idp:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -53,41 +197,126 @@ def get_tasks_by_idp(
             detail="Нет доступа к этому ИПР"
         )
     
-    # Просто возвращаем задачи без сортировки
-    # Вся сортировка на фронтенде
-    tasks = db.query(Task).filter(Task.idp_id == idp_id).all()
+    priority_rank = literal_column(f"({TASK_PRIORITY_RANK})")
+    query = select(Task).where(Task.idp_id == idp_id)
+    if status_filter is not None:
+        query = query.where(Task.status == status_filter)
+    if priority:
+        query = query.where(Task.priority.in_(priority))
+    if deadline_from is not None:
+        query = query.where(Task.deadline >= deadline_from)
+    if deadline_to is not None:
+        query = query.where(Task.deadline <= deadline_to)
+    if after_id is not None:
+        # Ключ курсора берём подзапросами по первичному ключу — без отдельного запроса
+        cursor = aliased(Task)
+        query = query.where(tuple_(priority_rank, Task.created_at, Task.id) > tuple_(
+            select(priority_rank).select_from(cursor).where(cursor.id == after_id).scalar_subquery(),
+            select(cursor.created_at).where(cursor.id == after_id).scalar_subquery(),
+            after_id
+        ))
+    query = query.order_by(priority_rank, Task.created_at, Task.id)
+    if limit is not None:
+        query = query.limit(limit)
+    
+    if task_fields is not None:
+        tasks = await db.scalars(query.options(task_load_only(task_fields)))
+        return UTF8ORJSONResponse([task_to_dict(task, task_fields) for task in tasks])
+    
+    tasks = await db.scalars(query)
     return [TaskResponse.from_orm(task) for task in tasks]
 
-@router.get("/{task_id}", response_model=TaskResponse)
-def get_task(
-    task_id: int,
+@router.get("/idp/{idp_id}/skills", response_model=List[str])
+async def get_idp_skills(
+    idp_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
+    """Навыки всех задач ИПР — доска грузит задачи страницами и сама их не соберёт"""
+    idp = await db.get(IDP, idp_id)
+    if not idp:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Задача не найдена"
+            detail="ИПР не найден"
+        )
+
+    if idp.mentor_id != current_user.id and idp.mentee_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа к этому ИПР"
+        )
+
+    skill = Task.linked_skills["skill"].as_string()
+    skills = await db.scalars(
+        select(skill).where(Task.idp_id == idp_id, skill.isnot(None), skill != "").distinct().order_by(skill)
+    )
+    return skills.all()
+
+@router.get("/idp/{idp_id}/changes", response_model=TaskChangesResponse)
+async def get_task_changes(
+    idp_id: int,
+    since: int = Query(0, ge=0),
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Задачи ИПР, созданные, изменённые или удалённые после версии since.
+    version в ответе — отметка ИПР, прочитанная до выборки изменений: всё, что не новее
+    неё, уже закоммичено и попало в ответ. Изменения новее отметки могут прийти повторно"""
+    task_fields = parse_task_fields(fields)
+    idp = await db.get(IDP, idp_id)
+    if not idp:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="ИПР не найден"
         )
     
-    idp = task.idp
     if idp.mentor_id != current_user.id and idp.mentee_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нет доступа к этой задаче"
+            detail="Нет доступа к этому ИПР"
         )
     
-    return TaskResponse.from_orm(task)
+    query = select(Task).where(
+        Task.idp_id == idp_id,
+        Task.version > since
+    ).order_by(Task.version)
+    if task_fields is not None:
+        query = query.options(task_load_only(task_fields))
+    tasks = (await db.scalars(query)).all()
+    
+    tombstones = (await db.execute(select(TaskTombstone.task_id, TaskTombstone.version).where(
+        TaskTombstone.idp_id == idp_id,
+        TaskTombstone.version > since
+    ))).all()
+    
+    version = idp.change_version
+    deleted = [tombstone.task_id for tombstone in tombstones]
+    
+    if task_fields is not None:
+        return UTF8ORJSONResponse({
+            "version": version,
+            "tasks": [task_to_dict(task, task_fields) for task in tasks],
+            "deleted": deleted
+        })
+    return TaskChangesResponse(
+        version=version,
+        tasks=[TaskResponse.from_orm(task) for task in tasks],
+        deleted=deleted
+    )
 
-@router.patch("/{task_id}", response_model=TaskResponse)
-def update_task(
+@router.get("/{task_id}", response_model=TaskResponse)
+async def get_task(
     task_id: int,
-    task_update: TaskUpdate,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task_fields = parse_task_fields(fields)
+    query = select(Task).options(joinedload(Task.idp)).where(Task.id == task_id)
+    if task_fields is not None:
+        query = query.options(task_load_only(task_fields))
+    task = await db.scalar(query)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -101,22 +330,65 @@ def update_task(
             detail="Нет доступа к этой задаче"
         )
     
-    update_data = task_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(task, field, value)
+    if task_fields is not None:
+        return UTF8ORJSONResponse(task_to_dict(task, task_fields))
+    return TaskResponse.from_orm(task)
+
+@router.patch("/{task_id}", response_model=TaskResponse)
+async def update_task(
+    task_id: int,
+    task_update: TaskUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    update_data = task_update.dict(exclude_unset=True, exclude={"version"})
+    if not update_data:
+        return await get_task(task_id, None, current_user, db)
+    
+    # Проверка доступа, версии и само изменение — один UPDATE ... FROM idps ... RETURNING
+    query = update(Task).where(
+        Task.id == task_id,
+        Task.idp_id == IDP.id,
+        or_(IDP.mentor_id == current_user.id, IDP.mentee_id == current_user.id)
+    )
+    if task_update.version is not None:
+        query = query.where(Task.version == task_update.version)
+    task = await db.scalar(
+        query.values(**update_data).returning(Task).execution_options(synchronize_session=False)
+    )
+    
+    if task is None:
+        # Медленный путь только для ошибок: выясняем, почему строка не обновилась
+        row = (await db.execute(select(Task.version, IDP.mentor_id, IDP.mentee_id).join(
+            IDP, Task.idp_id == IDP.id
+        ).where(Task.id == task_id))).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Задача не найдена"
+            )
+        if row.mentor_id != current_user.id and row.mentee_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Нет доступа к этой задаче"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Задачу уже изменил другой участник, обновите доску"
+        )
     
-    db.commit()
-    db.refresh(task)
+    await events.publish(db, task.idp_id, "task.updated", task_id=task.id)
+    await db.commit()
     
     return TaskResponse.from_orm(task)
 
 @router.delete("/{task_id}")
-def delete_task(
+async def delete_task(
     task_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = await db.scalar(select(Task).options(joinedload(Task.idp)).where(Task.id == task_id))
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,8 +402,13 @@ def delete_task(
             detail="Только ментор может удалять задачи"
         )
     
-    db.delete(task)
-    db.commit()
+    # Сначала строка задачи, потом надгробие (его триггер блокирует ИПР): тот же порядок
+    # блокировок, что у UPDATE задачи, иначе параллельные удаление и изменение ждут друг друга
+    await db.delete(task)
+    await db.flush()
+    db.add(TaskTombstone(task_id=task.id, idp_id=task.idp_id))
+    await events.publish(db, task.idp_id, "task.deleted", task_id=task.id)
+    await db.commit()
     
     return {"message": "Задача удалена"}
 
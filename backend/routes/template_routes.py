@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+import re
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, literal_column, select
 from typing import List, Dict
 from backend.database import get_db
-from backend.models import TaskTemplate, User
+from backend.models import TaskTemplate, User, TEMPLATE_SEARCH_VECTOR
 from backend.auth import get_current_user
+from backend.catalog import catalog_cache
+from backend.responses import etag_matches
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/templates", tags=["Task Templates"])
@@ -27,27 +30,69 @@ class CategoryResponse(BaseModel):
     category: str
     count: int
 
+class SuggestionResponse(BaseModel):
+    kind: str
+    text: str
+    category: str
+
+def _prefix_tsquery(q: str) -> str:
+    """Строка для to_tsquery: все слова запроса, последнее — как префикс ("Pyth" -> Pyth:*)"""
+    # Из ввода остаются только буквы и цифры, операторы tsquery пользователь передать не может
+    words = re.findall(r"\w+", q)
+    if not words:
+        return ""
+    return " & ".join(words[:-1] + [f"{words[-1]}:*"])
+
 @router.get("/categories", response_model=List[CategoryResponse])
-def get_categories(
+async def get_categories(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    categories = db.query(
+    categories = (await db.execute(select(
         TaskTemplate.category,
         func.count(TaskTemplate.id).label('count')
-    ).group_by(TaskTemplate.category).order_by(TaskTemplate.category).all()
+    ).group_by(TaskTemplate.category).order_by(TaskTemplate.category))).all()
     
     return [{"category": cat, "count": count} for cat, count in categories]
 
+@router.get("/catalog")
+async def get_catalog(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Весь каталог шаблонов, сгруппированный по категориям (с ETag)"""
+    snapshot = await catalog_cache.get(db)
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": "private, no-cache"
+    }
+    
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+@router.get("/suggest", response_model=List[SuggestionResponse])
+async def suggest_templates(
+    prefix: str = "",
+    limit: int = Query(10, ge=1, le=20),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Автодополнение по названиям навыков и категориям (с учётом опечаток)"""
+    snapshot = await catalog_cache.get(db)
+    return snapshot.suggest_index.suggest(prefix, limit)
+
 @router.get("/by-category/{category}", response_model=List[TaskTemplateResponse])
-def get_templates_by_category(
+async def get_templates_by_category(
     category: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    templates = db.query(TaskTemplate).filter(
+    templates = (await db.scalars(select(TaskTemplate).where(
         TaskTemplate.category == category
-    ).order_by(TaskTemplate.skill_name, TaskTemplate.level).all()
+    ).order_by(TaskTemplate.skill_name, TaskTemplate.level))).all()
     
     if not templates:
         return []
@@ -55,40 +100,46 @@ def get_templates_by_category(
     return [TaskTemplateResponse.from_orm(t) for t in templates]
 
 @router.get("/search", response_model=List[TaskTemplateResponse])
-def search_templates(
+async def search_templates(
     q: str = "",
     category: str = None,
     level: int = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(TaskTemplate)
-    
-    if q:
-        search_pattern = f"%{q}%"
-        query = query.filter(
-            (TaskTemplate.skill_name.ilike(search_pattern)) |
-            (TaskTemplate.goal.ilike(search_pattern)) |
-            (TaskTemplate.description.ilike(search_pattern))
-        )
+    query = select(TaskTemplate)
     
     if category:
-        query = query.filter(TaskTemplate.category == category)
+        query = query.where(TaskTemplate.category == category)
     
     if level is not None:
-        query = query.filter(TaskTemplate.level == level)
+        query = query.where(TaskTemplate.level == level)
+    
+    q = _prefix_tsquery(q)
+    if q:
+        # Выражение совпадает с GIN-индексом ix_task_templates_search
+        search_vector = literal_column(f"({TEMPLATE_SEARCH_VECTOR})")
+        ts_query = func.to_tsquery("russian", q)
+        query = query.where(search_vector.op("@@")(ts_query)).order_by(
+            func.ts_rank_cd(search_vector, ts_query).desc(),
+            TaskTemplate.id
+        )
+    else:
+        query = query.order_by(TaskTemplate.category, TaskTemplate.skill_name, TaskTemplate.id)
     
-    templates = query.order_by(TaskTemplate.category, TaskTemplate.skill_name).all()
+    templates = await db.scalars(query.offset(offset).limit(limit))
     
     return [TaskTemplateResponse.from_orm(t) for t in templates]
 
 @router.get("/{template_id}", response_model=TaskTemplateResponse)
-def get_template(
+async def get_template(
     template_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    template = db.query(TaskTemplate).filter(TaskTemplate.id == template_id).first()
+    template = await db.get(TaskTemplate, template_id)
     
     if not template:
         raise HTTPException(
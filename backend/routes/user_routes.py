@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.database import get_db
 from backend.models import User
 from backend.auth import get_current_user
+from backend import events
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
@@ -27,7 +29,7 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_profile(
+async def get_current_user_profile(
     current_user: User = Depends(get_current_user)
 ):
     return UserResponse(
@@ -41,19 +43,19 @@ def get_current_user_profile(
     )
 
 @router.patch("/me", response_model=UserResponse)
-def update_current_user_profile(
+async def update_current_user_profile(
     update_data: UserUpdateRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     if update_data.full_name is not None:
         current_user.full_name = update_data.full_name
     
     if update_data.email is not None:
-        existing_user = db.query(User).filter(
+        existing_user = await db.scalar(select(User).where(
             User.email == update_data.email,
             User.id != current_user.id
-        ).first()
+        ))
         
         if existing_user:
             raise HTTPException(
@@ -69,8 +71,9 @@ def update_current_user_profile(
     if update_data.grade is not None:
         current_user.grade = update_data.grade
     
-    db.commit()
-    db.refresh(current_user)
+    await events.invalidate_sessions(db, user_id=current_user.id)
+    await db.commit()
+    await db.refresh(current_user)
     
     return UserResponse(
         id=current_user.id,
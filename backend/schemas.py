@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
 from datetime import datetime
 from backend.models import UserRole, TaskStatus, IDPStatus
 
@@ -57,15 +57,45 @@ class TaskUpdate(BaseModel):
     deadline: Optional[datetime] = None
     linked_skills: Optional[dict] = None
     checklist_state: Optional[dict] = None
+    # Версия задачи, которую видел клиент; при расхождении PATCH вернёт 409
+    version: Optional[int] = None
 
 class TaskResponse(TaskBase):
     id: int
     idp_id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
+    version: int
     
     class Config:
         from_attributes = True
 
+class TaskChangesResponse(BaseModel):
+    # Отметка: все изменения с версией не больше неё уже отданы; передаётся как since
+    version: int
+    tasks: List[TaskResponse] = []
+    deleted: List[int] = []
+
+class TaskBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    task_id: Optional[int] = None
+    data: Optional[TaskUpdate] = None
+
+class TaskBatchRequest(BaseModel):
+    idp_id: int
+    operations: List[TaskBatchOperation] = Field(..., min_length=1, max_length=500)
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: str
+    ok: bool
+    task_id: Optional[int] = None
+    detail: Optional[str] = None
+    task: Optional[TaskResponse] = None
+
+class TaskBatchResponse(BaseModel):
+    results: List[TaskBatchResult]
+
 class IDPBase(BaseModel):
     status: IDPStatus = IDPStatus.ACTIVE
 
@@ -75,11 +105,20 @@ class IDPCreate(BaseModel):
     mentee_position: Optional[str] = None
     mentee_grade: Optional[str] = None
 
+class IDPCreateFromTemplates(IDPCreate):
+    template_ids: List[int] = []
+    deadlines_from_duration: bool = True
+
 class IDPResponse(IDPBase):
     id: int
     mentor_id: int
     mentee_id: int
     created_at: datetime
+    total_tasks: int = 0
+    todo_tasks: int = 0
+    in_progress_tasks: int = 0
+    done_tasks: int = 0
+    change_version: int = 0
     mentor: UserResponse
     mentee: UserResponse
     tasks: List[TaskResponse] = []
@@ -87,4 +126,16 @@ class IDPResponse(IDPBase):
     class Config:
         from_attributes = True
 
-
+class IDPSummaryResponse(IDPBase):
+    id: int
+    mentor_id: int
+    mentee_id: int
+    mentor_name: str
+    mentee_name: str
+    created_at: datetime
+    total_tasks: int = 0
+    todo_tasks: int = 0
+    in_progress_tasks: int = 0
+    done_tasks: int = 0
+    overdue_tasks: int = 0
+    last_activity_at: datetime
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+# Выход и смена профиля сбрасывают кэш во всех воркерах только при EVENTS_BACKEND=postgres.
+# С бэкендом memory другие воркеры отдавали бы отозванный токен до TTL, поэтому при
+# нескольких воркерах (WEB_CONCURRENCY > 1) кэш там выключается — см. backend.events
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "60"))
+
+class SessionCache:
+    """LRU-кэш разрешённых сессий: токен -> снимок пользователя с ограниченным TTL"""
+
+    def __init__(self, max_size: int = SESSION_CACHE_SIZE, ttl: float = SESSION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+        # Растёт при каждом сбросе: put() снимка, прочитанного до сброса, игнорируется
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            deadline, session_expires_at, snapshot = entry
+            if deadline <= now or session_expires_at <= datetime.utcnow():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return snapshot
+
+    def put(self, token: str, snapshot: dict, session_expires_at: datetime, generation: Optional[int] = None):
+        """generation — значение self.generation до чтения сессии из БД"""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        deadline = time.monotonic() + self.ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (deadline, session_expires_at, snapshot)
+            self._tokens_by_user.setdefault(snapshot["id"], set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate(self, token: str):
+        with self._lock:
+            self.generation += 1
+            self._remove(token)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self.generation += 1
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def disable(self):
+        """Выключает кэш: get() всегда промах, put() ничего не сохраняет"""
+        with self._lock:
+            self.max_size = 0
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[2]["id"]
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+session_cache = SessionCache()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Сборка статики: имена с хешем содержимого, предсжатые .gz/.br копии и манифест.
+Запускается при старте приложения, для образа можно собрать заранее:
+python -m backend.static_assets
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import stat
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = "frontend/static"
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+FINGERPRINTED_EXTENSIONS = (".js", ".css")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Исходное имя -> путь хешированной копии относительно STATIC_DIR
+_manifest = {}
+
+def _write_once(path: str, data: bytes):
+    # Имя зависит от содержимого: существующий файл уже правильный.
+    # Запись через os.replace безопасна, когда несколько воркеров стартуют одновременно
+    if os.path.exists(path):
+        return
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def build_assets(static_dir: str = STATIC_DIR) -> dict:
+    """Собирает хешированные и сжатые копии статики, возвращает манифест"""
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    os.makedirs(dist_dir, exist_ok=True)
+
+    manifest = {}
+    for name in sorted(os.listdir(static_dir)):
+        source = os.path.join(static_dir, name)
+        stem, extension = os.path.splitext(name)
+        if extension not in FINGERPRINTED_EXTENSIONS or not os.path.isfile(source):
+            continue
+        with open(source, "rb") as f:
+            data = f.read()
+        hashed_name = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+        target = os.path.join(dist_dir, hashed_name)
+        _write_once(target, data)
+        _write_once(f"{target}.gz", gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_once(f"{target}.br", brotli.compress(data, quality=11))
+        manifest[name] = f"{DIST_DIR}/{hashed_name}"
+
+    manifest_data = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(manifest_data)
+    os.replace(tmp_path, manifest_path)
+
+    _manifest.clear()
+    _manifest.update(manifest)
+    return manifest
+
+def asset_url(name: str) -> str:
+    """URL статического файла для шаблонов; без сборки отдаёт исходное имя"""
+    return f"/static/{_manifest.get(name, name)}"
+
+class StaticAssets(StaticFiles):
+    """StaticFiles, который отдаёт хешированные файлы предсжатыми и с Cache-Control: immutable"""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if not path.startswith(os.path.join(DIST_DIR, "")) or path.endswith(MANIFEST_NAME):
+            return await super().get_response(path, scope)
+
+        response = None
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if scope["method"] in ("GET", "HEAD"):
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if encoding not in accept_encoding:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    response = self.file_response(full_path, stat_result, scope)
+                    if response.status_code == 304:
+                        break
+                    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                    if media_type.startswith("text/"):
+                        media_type += "; charset=utf-8"
+                    response.headers["content-type"] = media_type
+                    response.headers["content-encoding"] = encoding
+                    break
+
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        response.headers["vary"] = "Accept-Encoding"
+        return response
+
+if __name__ == "__main__":
+    for name, hashed in build_assets().items():
+        print(f"✅ {name} -> {hashed}")
+    if brotli is None:
+        print("⚠ Модуль brotli не установлен, собраны только .gz")
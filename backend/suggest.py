@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+def normalize(value: str) -> str:
+    return " ".join(value.lower().replace("ё", "е").split())
+
+def trigrams(value: str) -> set:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SuggestIndex:
+    """Индекс автодополнения: префиксы слов через bisect, опечатки через триграммы"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str]]):
+        # entries: (kind, text, category)
+        self.entries = []
+        self._words = []
+        self._trigrams = {}
+        seen = set()
+        for kind, value, category in entries:
+            key = (kind, value, category)
+            if not value or key in seen:
+                continue
+            seen.add(key)
+            idx = len(self.entries)
+            normalized = normalize(value)
+            self.entries.append({"kind": kind, "text": value, "category": category, "_norm": normalized})
+            words = normalized.split(" ")
+            for position in range(len(words)):
+                # Хвосты фразы: префикс может начинаться с любого слова
+                self._words.append((" ".join(words[position:]), position, idx))
+            for gram in trigrams(normalized):
+                self._trigrams.setdefault(gram, []).append(idx)
+        self._words.sort()
+        self._keys = [word for word, _, _ in self._words]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        query = normalize(prefix)
+        if not query:
+            return []
+
+        scored = {}
+        start = bisect_left(self._keys, query)
+        for word, position, idx in self._words[start:]:
+            if not word.startswith(query):
+                break
+            # Совпадение с начала названия важнее совпадения с середины
+            score = 2.0 if position == 0 else 1.5
+            if scored.get(idx, 0) < score:
+                scored[idx] = score
+
+        if len(scored) < limit:
+            query_grams = trigrams(query)
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._trigrams.get(gram, ()))
+            for idx, common in shared.items():
+                if idx in scored:
+                    continue
+                similarity = common / len(query_grams)
+                if similarity >= 0.5:
+                    scored[idx] = similarity
+
+        ranked = sorted(
+            scored.items(),
+            key=lambda item: (-item[1], len(self.entries[item[0]]["_norm"]), self.entries[item[0]]["_norm"])
+        )
+        return [
+            {key: value for key, value in self.entries[idx].items() if not key.startswith("_")}
+            for idx, _ in ranked[:limit]
+        ]
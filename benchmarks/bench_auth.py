@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Микробенчмарк разрешения сессии: два запроса (sessions, затем users)
+против одного запроса с JOIN по составному индексу.
+Заполняет таблицу sessions до SESSIONS_ROWS строк (по умолчанию 1 000 000).
+
+Запуск из корня проекта: python -m benchmarks.bench_auth
+"""
+import os
+import time
+import random
+from datetime import datetime
+
+from sqlalchemy import text
+from backend.database import SessionLocal, engine, init_db
+from backend.models import User, Session, UserRole
+
+SESSIONS_ROWS = int(os.getenv("SESSIONS_ROWS", "1000000"))
+ITERATIONS = int(os.getenv("ITERATIONS", "2000"))
+
+def seed(db):
+    user = db.query(User).filter(User.email == "bench@example.com").first()
+    if not user:
+        user = User(full_name="Bench", email="bench@example.com", role=UserRole.MENTOR)
+        db.add(user)
+        db.commit()
+
+    existing = db.query(Session).count()
+    if existing < SESSIONS_ROWS:
+        print(f"📥 Генерация {SESSIONS_ROWS - existing} сессий...")
+        db.execute(text("""
+            INSERT INTO sessions (token, user_id, expires_at, created_at, is_active)
+            SELECT md5(random()::text || g::text), :user_id,
+                   now() + interval '1 day', now(), (g % 10 <> 0)
+            FROM generate_series(1, :n) AS g
+        """), {"user_id": user.id, "n": SESSIONS_ROWS - existing})
+        db.commit()
+        db.execute(text("ANALYZE sessions"))
+        db.commit()
+
+    tokens = [t for (t,) in db.execute(text(
+        "SELECT token FROM sessions WHERE is_active ORDER BY random() LIMIT :n"
+    ), {"n": ITERATIONS})]
+    return tokens
+
+def resolve_two_queries(db, token):
+    session = db.query(Session).filter(
+        Session.token == token,
+        Session.is_active == True,
+        Session.expires_at > datetime.utcnow()
+    ).first()
+    return db.query(User).filter(User.id == session.user_id).first()
+
+def resolve_joined(db, token):
+    return db.query(User, Session.expires_at).join(
+        Session, Session.user_id == User.id
+    ).filter(
+        Session.token == token,
+        Session.is_active == True,
+        Session.expires_at > datetime.utcnow()
+    ).first()
+
+def measure(name, resolve, tokens):
+    db = SessionLocal()
+    try:
+        random.shuffle(tokens)
+        start = time.perf_counter()
+        for token in tokens:
+            resolve(db, token)
+            db.expunge_all()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+    print(f"{name:<16} {elapsed / len(tokens) * 1e6:8.1f} мкс/запрос")
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        tokens = seed(db)
+    finally:
+        db.close()
+
+    print(f"Строк в sessions: {SESSIONS_ROWS}, итераций: {len(tokens)}")
+    measure("two queries", resolve_two_queries, tokens)
+    measure("joined", resolve_joined, tokens)
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
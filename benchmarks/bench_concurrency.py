@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Нагрузочный бенчмарк API: CONCURRENCY одновременных клиентов в течение DURATION секунд
+бьют в список эндпоинтов запущенного сервера и считают запросы в секунду.
+Для сравнения синхронного и асинхронного стека запустите сервер на нужной ревизии.
+
+Запуск из корня проекта (нужен httpx):
+    BENCH_TOKEN=<токен сессии> python -m benchmarks.bench_concurrency
+"""
+import asyncio
+import os
+import time
+
+import httpx
+
+BASE_URL = os.getenv("BENCH_URL", "http://localhost:8000")
+TOKEN = os.getenv("BENCH_TOKEN", "")
+CONCURRENCY = int(os.getenv("CONCURRENCY", "500"))
+DURATION = float(os.getenv("DURATION", "30"))
+ENDPOINTS = os.getenv("BENCH_ENDPOINTS", "/api/idps/,/api/idps/summary,/api/templates/categories").split(",")
+
+async def client_loop(client, deadline, stats, offset):
+    i = offset
+    while time.perf_counter() < deadline:
+        endpoint = ENDPOINTS[i % len(ENDPOINTS)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(endpoint)
+            key = "ok" if response.status_code < 400 else "errors"
+        except httpx.HTTPError:
+            key = "errors"
+        stats[key] += 1
+        stats["latencies"].append(time.perf_counter() - started)
+
+async def main():
+    headers = {"Authorization": f"Bearer {TOKEN}"} if TOKEN else {}
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+    stats = {"ok": 0, "errors": 0, "latencies": []}
+
+    async with httpx.AsyncClient(base_url=BASE_URL, headers=headers, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        deadline = started + DURATION
+        await asyncio.gather(*(client_loop(client, deadline, stats, n) for n in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(stats["latencies"]) or [0]
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"Клиентов: {CONCURRENCY}, длительность: {elapsed:.1f} с")
+    print(f"Успешных: {stats['ok']}, ошибок: {stats['errors']}")
+    print(f"RPS: {stats['ok'] / elapsed:,.0f}, p50: {p50 * 1000:.1f} мс, p99: {p99 * 1000:.1f} мс")
+
+if __name__ == "__main__":
+    asyncio.run(main())
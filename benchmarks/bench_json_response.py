@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Сериализация ответа GET /api/idps/ для большой доски ментора: JSONResponse,
+которым отвечал FastAPI до перехода, против UTF8ORJSONResponse.
+Оба класса получают одно и то же содержимое: FastAPI сначала прогоняет результат
+через response_model (field.serialize), этот шаг общий и меряется отдельно.
+Старая подмена fastapi.encoders.jsonable_encoder в этот путь не попадала:
+fastapi.routing импортирует функцию по имени ещё до подмены.
+База данных не нужна: доска из IDPS ИПР по TASKS задач собирается в памяти.
+
+Запуск из корня проекта: python -m benchmarks.bench_json_response
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from backend.responses import UTF8ORJSONResponse
+from backend.schemas import IDPResponse
+
+IDPS = int(os.getenv("IDPS", "50"))
+TASKS = int(os.getenv("TASKS", "100"))
+ITERATIONS = int(os.getenv("ITERATIONS", "20"))
+
+def build_board() -> List[IDPResponse]:
+    now = datetime.utcnow()
+    mentor = {"id": 1, "full_name": "Иванова Мария Петровна", "email": "mentor@example.com",
+              "role": "mentor", "access_code": None, "mentor_id": None, "created_at": now}
+    board = []
+    for i in range(IDPS):
+        mentee = {"id": i + 2, "full_name": f"Сотрудник {i} Тестировщиков", "email": f"mentee{i}@example.com",
+                  "role": "mentee", "access_code": f"CODE{i:04d}", "mentor_id": 1, "created_at": now}
+        tasks = [{
+            "id": i * TASKS + j,
+            "idp_id": i + 1,
+            "title": f"Освоить автоматизацию API-тестов, этап {j}",
+            "description": "Изучить Postman и pytest, написать набор регрессионных проверок для сервиса заказов",
+            "status": ("todo", "in_progress", "done")[j % 3],
+            "priority": ("high", "medium", "low")[j % 3],
+            "deadline": now + timedelta(days=j),
+            "linked_skills": {"skills": ["Postman", "pytest", "REST"], "level": 2},
+            "checklist_state": {"items": [{"text": "Прочитать документацию", "done": j % 2 == 0}] * 5},
+            "created_at": now,
+            "updated_at": now,
+            "version": j,
+        } for j in range(TASKS)]
+        board.append(IDPResponse.model_validate({
+            "id": i + 1, "status": "active", "mentor_id": 1, "mentee_id": i + 2, "created_at": now,
+            "mentor": mentor, "mentee": mentee, "tasks": tasks
+        }))
+    return board
+
+def serialize(board):
+    # Так FastAPI готовит содержимое по response_model перед передачей в класс ответа
+    return TypeAdapter(List[IDPResponse]).dump_python(board, mode="json")
+
+def json_render(content) -> bytes:
+    return JSONResponse(content).body
+
+def orjson_render(content) -> bytes:
+    return UTF8ORJSONResponse(content).body
+
+def measure(name, action, argument):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        result = action(argument)
+    elapsed = (time.perf_counter() - start) / ITERATIONS
+    print(f"{name:<16} {elapsed * 1000:8.2f} мс/ответ")
+    return elapsed, result
+
+def main():
+    board = build_board()
+    print(f"ИПР: {IDPS}, задач: {IDPS * TASKS}, итераций: {ITERATIONS}")
+    common, content = measure("response_model", serialize, board)
+    before, body = measure("JSONResponse", json_render, content)
+    after, fast_body = measure("orjson", orjson_render, content)
+    assert json.loads(body) == json.loads(fast_body)
+    print(f"Размер тела: {len(body) / 1024:.0f} КБ")
+    print(f"Ускорение рендеринга: {before / after:.1f}x")
+    print(f"Ускорение ответа целиком: {(common + before) / (common + after):.1f}x")
+
+if __name__ == "__main__":
+    main()
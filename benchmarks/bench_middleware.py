@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Накладные расходы middleware, проставляющего charset=utf-8:
+прежний BaseHTTPMiddleware против чистого ASGI UTF8Middleware из main.py.
+Запросы подаются в ASGI-приложение через httpx.ASGITransport, без сети и без базы данных.
+
+Запуск из корня проекта: python -m benchmarks.bench_middleware
+"""
+import asyncio
+import os
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from main import UTF8Middleware
+
+ITERATIONS = int(os.getenv("ITERATIONS", "5000"))
+
+class LegacyUTF8Middleware(BaseHTTPMiddleware):
+    """Прежняя реализация из main.py"""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if response.headers.get("content-type"):
+            content_type = response.headers["content-type"]
+            if "text/plain" in content_type and "charset" not in content_type:
+                response.headers["content-type"] = "text/plain; charset=utf-8"
+        return response
+
+async def ping(request):
+    return PlainTextResponse("ок", media_type="text/plain")
+
+def build_app(middleware=None):
+    app = Starlette(routes=[Route("/ping", ping)])
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+async def run(app) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            await client.get("/ping")
+        return (time.perf_counter() - start) / ITERATIONS
+
+def main():
+    results = {}
+    for name, middleware in (("none", None), ("base_http", LegacyUTF8Middleware), ("asgi", UTF8Middleware)):
+        results[name] = asyncio.run(run(build_app(middleware)))
+        print(f"{name:<10} {results[name] * 1e6:8.1f} мкс/запрос")
+    print(f"Накладные расходы: base_http {(results['base_http'] - results['none']) * 1e6:+.1f} мкс, "
+          f"asgi {(results['asgi'] - results['none']) * 1e6:+.1f} мкс")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Сравнение поиска шаблонов: три ILIKE '%q%' против полнотекстового поиска
+по GIN-индексу ix_task_templates_search.
+Дополняет task_templates синтетическими строками (source='bench') до TEMPLATES_ROWS.
+
+Запуск из корня проекта: python -m benchmarks.bench_template_search
+"""
+import os
+import time
+
+from sqlalchemy import func, literal_column, text
+from backend.database import SessionLocal, engine, init_db
+from backend.models import TaskTemplate, TEMPLATE_SEARCH_VECTOR
+from backend.routes.template_routes import _prefix_tsquery
+
+TEMPLATES_ROWS = int(os.getenv("TEMPLATES_ROWS", "100000"))
+ITERATIONS = int(os.getenv("ITERATIONS", "50"))
+QUERIES = ["тестирование", "Postm", "автоматизация API", "нагрузочн", "SQL"]
+
+def seed(db):
+    existing = db.query(TaskTemplate).count()
+    if existing >= TEMPLATES_ROWS:
+        return
+    print(f"📥 Генерация {TEMPLATES_ROWS - existing} шаблонов...")
+    # Перемешиваем тексты реальных шаблонов, чтобы словарь был правдоподобным
+    db.execute(text("""
+        INSERT INTO task_templates (category, skill_name, level, goal, description, source, created_at)
+        SELECT t.category, t.skill_name || ' ' || g, (g % 4) + 1, t.goal, t.description, 'bench', now()
+        FROM generate_series(1, :n) AS g
+        CROSS JOIN LATERAL (
+            SELECT category, skill_name, goal, description FROM task_templates
+            WHERE source <> 'bench'
+            OFFSET (g % GREATEST((SELECT count(*) FROM task_templates WHERE source <> 'bench'), 1))
+            LIMIT 1
+        ) AS t
+    """), {"n": TEMPLATES_ROWS - existing})
+    db.commit()
+    for index in TaskTemplate.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    db.execute(text("ANALYZE task_templates"))
+    db.commit()
+
+def search_ilike(db, q):
+    pattern = f"%{q}%"
+    return db.query(TaskTemplate).filter(
+        (TaskTemplate.skill_name.ilike(pattern)) |
+        (TaskTemplate.goal.ilike(pattern)) |
+        (TaskTemplate.description.ilike(pattern))
+    ).order_by(TaskTemplate.category, TaskTemplate.skill_name).limit(50).all()
+
+def search_fulltext(db, q):
+    search_vector = literal_column(f"({TEMPLATE_SEARCH_VECTOR})")
+    ts_query = func.to_tsquery("russian", _prefix_tsquery(q))
+    return db.query(TaskTemplate).filter(search_vector.op("@@")(ts_query)).order_by(
+        func.ts_rank_cd(search_vector, ts_query).desc(),
+        TaskTemplate.id
+    ).limit(50).all()
+
+def measure(name, search):
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            for q in QUERIES:
+                search(db, q)
+                db.expunge_all()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+    print(f"{name:<10} {elapsed / (ITERATIONS * len(QUERIES)) * 1000:8.2f} мс/запрос")
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        seed(db)
+        total = db.query(TaskTemplate).count()
+    finally:
+        db.close()
+
+    print(f"Шаблонов: {total}, запросов: {ITERATIONS * len(QUERIES)}")
+    measure("ILIKE", search_ilike)
+    measure("FTS", search_fulltext)
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
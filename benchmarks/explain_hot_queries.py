@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Проверка планов горячих запросов API: EXPLAIN (ANALYZE, BUFFERS) на большом
+синтетическом наборе данных. Завершается с кодом 1, если хотя бы один запрос
+читает горячую таблицу последовательным сканированием.
+Набор данных (домен @explain.local) создаётся один раз и переиспользуется.
+
+Запуск из корня проекта: python -m benchmarks.explain_hot_queries
+"""
+import os
+import sys
+from datetime import datetime
+
+from sqlalchemy import func, literal_column, select, text, tuple_
+from sqlalchemy.orm import aliased, joinedload, selectinload
+from backend.database import SessionLocal, engine, init_db
+from backend.idp_counters import overdue_tasks
+from backend.models import (
+    User, IDP, Task, TaskComment, TaskTombstone, Session, UserRole, IDPStatus, TaskStatus, TASK_PRIORITY_RANK
+)
+
+MENTORS = int(os.getenv("MENTORS", "1000"))
+MENTEES_PER_MENTOR = int(os.getenv("MENTEES_PER_MENTOR", "20"))
+TASKS_PER_IDP = int(os.getenv("TASKS_PER_IDP", "10"))
+COMMENTS_PER_TASK = int(os.getenv("COMMENTS_PER_TASK", "3"))
+
+# Таблицы, которые растут вместе с числом пользователей; seq scan по ним недопустим
+HOT_TABLES = {"users", "idps", "tasks", "task_comments", "task_tombstones", "sessions"}
+
+def seed(db):
+    if db.scalar(select(User.id).where(User.email == "mentor1@explain.local")):
+        return
+    print(f"📥 Генерация данных: {MENTORS} менторов, {MENTORS * MENTEES_PER_MENTOR} ИПР...")
+    db.execute(text("""
+        INSERT INTO users (full_name, email, role, created_at)
+        SELECT 'Ментор ' || g, 'mentor' || g || '@explain.local', 'MENTOR', now()
+        FROM generate_series(1, :n) AS g
+    """), {"n": MENTORS})
+    db.execute(text("""
+        INSERT INTO users (full_name, email, role, access_code, created_at)
+        SELECT 'Менти ' || g, 'mentee' || g || '@explain.local', 'MENTEE', 'EXPL' || g, now()
+        FROM generate_series(1, :n) AS g
+    """), {"n": MENTORS * MENTEES_PER_MENTOR})
+    db.execute(text("""
+        WITH mentors AS (
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM users
+            WHERE role = 'MENTOR' AND email LIKE '%@explain.local'
+        ), mentees AS (
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn FROM users
+            WHERE role = 'MENTEE' AND email LIKE '%@explain.local'
+        )
+        INSERT INTO idps (mentor_id, mentee_id, status, created_at)
+        SELECT mentors.id, mentees.id,
+               CASE WHEN mentees.rn % 5 = 0 THEN 'COMPLETED' ELSE 'ACTIVE' END::idpstatus, now()
+        FROM mentees JOIN mentors ON mentors.rn = mentees.rn % :mentors
+    """), {"mentors": MENTORS})
+    db.execute(text("""
+        INSERT INTO tasks (idp_id, title, status, priority, deadline, created_at, updated_at)
+        SELECT idps.id, 'Задача ' || g,
+               (ARRAY['TODO', 'IN_PROGRESS', 'DONE'])[g % 3 + 1]::taskstatus,
+               (ARRAY['high', 'medium', 'low'])[g % 3 + 1],
+               now() + g * interval '1 day', now(), now()
+        FROM idps JOIN users ON users.id = idps.mentor_id AND users.email LIKE '%@explain.local'
+        CROSS JOIN generate_series(1, :n) AS g
+    """), {"n": TASKS_PER_IDP})
+    db.execute(text("""
+        INSERT INTO task_comments (task_id, user_id, comment, created_at)
+        SELECT tasks.id, idps.mentor_id, 'Комментарий ' || g, now() - g * interval '1 minute'
+        FROM tasks JOIN idps ON idps.id = tasks.idp_id
+        JOIN users ON users.id = idps.mentor_id AND users.email LIKE '%@explain.local'
+        CROSS JOIN generate_series(1, :n) AS g
+    """), {"n": COMMENTS_PER_TASK})
+    db.execute(text("""
+        INSERT INTO sessions (token, user_id, expires_at, created_at, is_active)
+        SELECT md5('explain' || id::text), id, now() + interval '1 day', now(), true
+        FROM users WHERE email LIKE '%@explain.local'
+    """))
+    db.commit()
+    for table in sorted(HOT_TABLES):
+        db.execute(text(f"ANALYZE {table}"))
+    db.commit()
+
+def hot_queries(db):
+    """Запросы маршрутов API с параметрами реального пользователя из набора"""
+    mentor = db.scalar(select(User).where(User.email == "mentor1@explain.local"))
+    idp = db.scalar(select(IDP).where(IDP.mentor_id == mentor.id).order_by(IDP.id).limit(1))
+    mentee = db.get(User, idp.mentee_id)
+    task = db.scalar(select(Task).where(Task.idp_id == idp.id).order_by(Task.id).limit(1))
+    token = db.scalar(select(Session.token).where(Session.user_id == mentor.id).limit(1))
+    priority_rank = literal_column(f"({TASK_PRIORITY_RANK})")
+    cursor = aliased(Task)
+    idp_query = select(IDP).options(
+        joinedload(IDP.mentor), joinedload(IDP.mentee), selectinload(IDP.tasks)
+    )
+
+    return [
+        ("auth: сессия по токену", select(User, Session.expires_at).join(
+            Session, Session.user_id == User.id
+        ).where(
+            Session.token == token, Session.is_active == True, Session.expires_at > datetime.utcnow()
+        )),
+        ("login: ментор по email", select(User).where(
+            User.email == mentor.email, User.role == UserRole.MENTOR
+        )),
+        ("login: менти по коду", select(User).where(
+            User.access_code == mentee.access_code, User.role == UserRole.MENTEE
+        )),
+        ("idps: список ментора", idp_query.where(
+            IDP.mentor_id == mentor.id, IDP.status == IDPStatus.ACTIVE
+        )),
+        ("idps: список менти", idp_query.where(
+            IDP.mentee_id == mentee.id, IDP.status == IDPStatus.ACTIVE
+        )),
+        ("idps: задачи досок (selectin)", select(Task).where(
+            Task.idp_id.in_(select(IDP.id).where(IDP.mentor_id == mentor.id).scalar_subquery())
+        )),
+        ("idps: сводка ментора", select(
+            IDP.id, IDP.total_tasks, IDP.todo_tasks, IDP.in_progress_tasks, IDP.done_tasks,
+            overdue_tasks(), func.coalesce(IDP.last_activity_at, IDP.created_at)
+        ).where(IDP.mentor_id == mentor.id, IDP.status == IDPStatus.ACTIVE)),
+        ("idps: менти ментора", select(IDP).options(joinedload(IDP.mentee)).where(
+            IDP.mentor_id == mentor.id, IDP.status == IDPStatus.ACTIVE
+        )),
+        ("tasks: доска ИПР", select(Task).where(Task.idp_id == idp.id)),
+        ("tasks: страница колонки", select(Task).where(
+            Task.idp_id == idp.id, Task.status == TaskStatus.TODO,
+            tuple_(priority_rank, Task.created_at, Task.id) > tuple_(
+                select(priority_rank).select_from(cursor).where(cursor.id == task.id).scalar_subquery(),
+                select(cursor.created_at).where(cursor.id == task.id).scalar_subquery(),
+                task.id
+            )
+        ).order_by(priority_rank, Task.created_at, Task.id).limit(50)),
+        ("tasks: изменения доски", select(Task).where(
+            Task.idp_id == idp.id, Task.version > task.version
+        ).order_by(Task.version)),
+        ("tasks: удалённые задачи", select(TaskTombstone.task_id, TaskTombstone.version).where(
+            TaskTombstone.idp_id == idp.id, TaskTombstone.version > task.version
+        )),
+        ("tasks: задача с ИПР", select(Task).options(joinedload(Task.idp)).where(Task.id == task.id)),
+        ("comments: лента задачи", select(TaskComment, User.full_name).outerjoin(
+            User, TaskComment.user_id == User.id
+        ).where(TaskComment.task_id == task.id, TaskComment.id > 0).order_by(TaskComment.id).limit(100)),
+    ]
+
+def walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+def explain(db, statement):
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    # Двоеточия в литералах (время) не должны приниматься за параметры text()
+    sql = sql.replace(":", "\\:")
+    result = db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar()
+    return result[0]
+
+def main():
+    init_db()
+
+    db = SessionLocal()
+    failures = []
+    try:
+        seed(db)
+        for name, statement in hot_queries(db):
+            report = explain(db, statement)
+            nodes = list(walk(report["Plan"]))
+            seq_scans = sorted({
+                node["Relation Name"] for node in nodes
+                if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in HOT_TABLES
+            })
+            plan = report["Plan"]
+            buffers = plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+            mark = "❌" if seq_scans else "✅"
+            print(f"{mark} {name:<32} {report['Execution Time']:8.2f} мс  буферов: {buffers:6d}"
+                  + (f"  seq scan: {', '.join(seq_scans)}" if seq_scans else ""))
+            if seq_scans:
+                failures.append(name)
+    finally:
+        db.close()
+        engine.dispose()
+
+    if failures:
+        print(f"\n❌ Последовательное сканирование в {len(failures)} запросах")
+        sys.exit(1)
+    print("\n✅ Все горячие запросы используют индексы")
+
+if __name__ == "__main__":
+    main()
@@ -53,9 +53,9 @@ if __name__ == "__main__":
     print("=" * 50)
     
     # Инициализация БД
-    print("\n1️⃣  Создание таблиц...")
+    print("\n1️⃣  Применение миграций...")
     init_db()
-    print("✅ Таблицы созданы")
+    print("✅ Схема базы данных актуальна")
     
     # Создание первого ментора
     print("\n2️⃣  Создание первого ментора...")
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 import json
 import csv
-from sqlalchemy import func
+import time
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from backend.database import SessionLocal, init_db
 from backend.models import TaskTemplate
+from backend.catalog import bump_catalog_version
 
 # Функция нормализации названий категорий
 def normalize_category(category):
@@ -33,48 +36,69 @@ def normalize_category(category):
     
     return category_mapping.get(category, category)
 
+BATCH_SIZE = 1000
+
+# Ключ совпадает с уникальным индексом uq_task_templates_source_key: уровень NULL
+# приравнен к 0, иначе ON CONFLICT не находит такие строки и каждая загрузка их дублирует
+TEMPLATE_KEY_ELEMENTS = ["source", "category", "skill_name", text("coalesce(level, 0)")]
+
+def template_key(row):
+    return row["source"], row["category"], row["skill_name"], row["level"] or 0
+
+def upsert_templates(db, rows):
+    """Пишет шаблоны пачками через INSERT ... ON CONFLICT DO UPDATE"""
+    # Дедупликация в памяти: при повторе ключа побеждает последняя строка
+    unique_rows = list({template_key(row): row for row in rows}.values())
+    
+    for start in range(0, len(unique_rows), BATCH_SIZE):
+        batch = unique_rows[start:start + BATCH_SIZE]
+        started_at = time.perf_counter()
+        
+        stmt = pg_insert(TaskTemplate).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=TEMPLATE_KEY_ELEMENTS,
+            set_={
+                "goal": stmt.excluded.goal,
+                "description": stmt.excluded.description,
+                "criteria": stmt.excluded.criteria,
+                "duration_weeks": stmt.excluded.duration_weeks,
+            }
+        )
+        db.execute(stmt)
+        
+        elapsed = time.perf_counter() - started_at
+        rate = len(batch) / elapsed if elapsed > 0 else float("inf")
+        print(f"   • пачка {start // BATCH_SIZE + 1}: {len(batch)} строк, {rate:,.0f} строк/с")
+    
+    return len(unique_rows)
+
 def load_kb_tasks():
     print("📥 Загрузка задач из kb_tasks.json...")
     
     with open('kb_tasks.json', 'r', encoding='utf-8') as f:
         tasks = json.load(f)
     
+    rows = []
+    for i, task in enumerate(tasks):
+        try:
+            rows.append({
+                "category": normalize_category(task.get('category', 'Без категории')),
+                "skill_name": task.get('skillName') or 'Без названия',
+                "level": task.get('level'),
+                "goal": task.get('goal'),
+                "description": task.get('description'),
+                "criteria": task.get('criteria'),
+                "duration_weeks": task.get('durationWeeks'),
+                "source": 'kb_tasks',
+            })
+        except Exception as e:
+            print(f"   ⚠ Пропущена задача #{i}: {e}")
+            continue
+    
     db = SessionLocal()
     try:
-        count = 0
-        for i, task in enumerate(tasks):
-            try:
-                normalized_category = normalize_category(task.get('category', ''))
-                
-                existing = db.query(TaskTemplate).filter(
-                    TaskTemplate.category == normalized_category,
-                    TaskTemplate.skill_name == task.get('skillName', ''),
-                    TaskTemplate.level == task.get('level'),
-                    TaskTemplate.source == 'kb_tasks'
-                ).first()
-                
-                if existing:
-                    continue
-                
-                # Нормализуем категорию
-                normalized_category = normalize_category(task.get('category', 'Без категории'))
-                
-                template = TaskTemplate(
-                    category=normalized_category,
-                    skill_name=task.get('skillName', 'Без названия'),
-                    level=task.get('level'),
-                    goal=task.get('goal'),
-                    description=task.get('description'),
-                    criteria=task.get('criteria'),
-                    duration_weeks=task.get('durationWeeks'),
-                    source='kb_tasks'
-                )
-                db.add(template)
-                count += 1
-            except Exception as e:
-                print(f"   ⚠ Пропущена задача #{i}: {e}")
-                continue
-        
+        count = upsert_templates(db, rows)
+        bump_catalog_version(db)
         db.commit()
         print(f"✅ Загружено {count} задач из kb_tasks.json")
     except Exception as e:
@@ -83,64 +107,51 @@ def load_kb_tasks():
     finally:
         db.close()
 
+HARDSKILLS_LEVEL_COLUMNS = {
+    1: 'Минимальные знания, применение для самых простых задач',
+    2: 'Уверенные знания, применение для повседневных задач',
+    3: 'Глубокие знания, применение знаний, внедрение на проекте, адаптация, обучение',
+    4: 'Очень глубокие знания, применение для задач любой сложности',
+}
+
 def load_hardskills():
     print("📥 Загрузка навыков из HardSkills Review QA 4.0.csv...")
     
-    db = SessionLocal()
-    try:
-        count = 0
-        with open('HardSkills Review QA 4.0.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            current_category = None
+    rows = []
+    with open('HardSkills Review QA 4.0.csv', 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        current_category = None
+        
+        for row in reader:
+            group = row['Группа навыков'].strip()
+            if group:
+                current_category = normalize_category(group)
+                continue
             
-            for row in reader:
-                group = row['Группа навыков'].strip()
-                if group:
-                    current_category = group
-                    continue
-                
-                skill = row['Навык'].strip()
-                if not skill or not current_category:
+            skill = row['Навык'].strip()
+            if not skill or not current_category:
+                continue
+            
+            for level, level_key in HARDSKILLS_LEVEL_COLUMNS.items():
+                description = (row.get(level_key) or '').strip()
+                if not description:
                     continue
                 
-                for level in range(1, 5):
-                    level_key = f'Минимальные знания, применение для самых простых задач' if level == 1 else \
-                                f'Уверенные знания, применение для повседневных задач' if level == 2 else \
-                                f'Глубокие знания, применение знаний, внедрение на проекте, адаптация, обучение' if level == 3 else \
-                                f'Очень глубокие знания, применение для задач любой сложности'
-                    
-                    description = row.get(level_key, '').strip()
-                    if not description:
-                        continue
-                    
-                    normalized_category = normalize_category(current_category)
-                    
-                    existing = db.query(TaskTemplate).filter(
-                        TaskTemplate.category == normalized_category,
-                        TaskTemplate.skill_name == skill,
-                        TaskTemplate.level == level,
-                        TaskTemplate.source == 'hardskills'
-                    ).first()
-                    
-                    if existing:
-                        continue
-                    
-                    # Нормализуем категорию для hardskills тоже
-                    normalized_category = normalize_category(current_category)
-                    
-                    template = TaskTemplate(
-                        category=normalized_category,
-                        skill_name=skill,
-                        level=level,
-                        goal=f"Достичь уровня {level} по навыку '{skill}'",
-                        description=description,
-                        criteria="Демонстрация навыка на проекте и подтверждение ментором",
-                        duration_weeks=4,
-                        source='hardskills'
-                    )
-                    db.add(template)
-                    count += 1
-        
+                rows.append({
+                    "category": current_category,
+                    "skill_name": skill,
+                    "level": level,
+                    "goal": f"Достичь уровня {level} по навыку '{skill}'",
+                    "description": description,
+                    "criteria": "Демонстрация навыка на проекте и подтверждение ментором",
+                    "duration_weeks": 4,
+                    "source": 'hardskills',
+                })
+    
+    db = SessionLocal()
+    try:
+        count = upsert_templates(db, rows)
+        bump_catalog_version(db)
         db.commit()
         print(f"✅ Загружено {count} навыков из HardSkills CSV")
     except Exception as e:
@@ -1,49 +1,72 @@
 # -*- coding: utf-8 -*-
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import os
 import uvicorn
-import json
-
-from backend.database import init_db
-from backend.routes import auth_routes, idp_routes, task_routes, logout_route, template_routes, comment_routes, user_routes
-
-# Исправление JSON encoder для правильной кодировки кириллицы
-from fastapi.encoders import jsonable_encoder as original_jsonable_encoder
-
-def utf8_jsonable_encoder(obj, **kwargs):
-    result = original_jsonable_encoder(obj, **kwargs)
-    if isinstance(result, (dict, list)):
-        return json.loads(json.dumps(result, ensure_ascii=False))
-    return result
-
-import fastapi.encoders
-fastapi.encoders.jsonable_encoder = utf8_jsonable_encoder
-
-# Middleware для установки charset=utf-8 в заголовках
-class UTF8Middleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        if response.headers.get("content-type"):
-            content_type = response.headers["content-type"]
-            if "application/json" in content_type and "charset" not in content_type:
-                response.headers["content-type"] = "application/json; charset=utf-8"
-            elif "text/html" in content_type and "charset" not in content_type:
-                response.headers["content-type"] = "text/html; charset=utf-8"
-            elif "text/plain" in content_type and "charset" not in content_type:
-                response.headers["content-type"] = "text/plain; charset=utf-8"
-        return response
+
+from backend.database import check_schema_version
+from backend.routes import auth_routes, idp_routes, task_routes, logout_route, template_routes, comment_routes, user_routes, event_routes, metrics_routes
+from backend import events
+from backend.responses import UTF8ORJSONResponse
+from backend.static_assets import StaticAssets, asset_url, build_assets
+from backend.page_cache import ShellCache
+
+# Middleware для установки charset=utf-8 в заголовках.
+# Чистый ASGI: правим только сообщение http.response.start, тело уходит без буферизации
+CHARSET_MEDIA_TYPES = ("application/json", "text/html", "text/plain")
+
+class UTF8Middleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_charset(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                content_type = headers.get("content-type")
+                if content_type and "charset" not in content_type:
+                    for media_type in CHARSET_MEDIA_TYPES:
+                        if media_type in content_type:
+                            headers["content-type"] = f"{media_type}; charset=utf-8"
+                            break
+            await send(message)
+
+        await self.app(scope, receive, send_with_charset)
+
+# Сжатие JSON API; HTML и статика сюда не попадают, а SSE нельзя буферизовать
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+
+class APIGZipMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = GZIP_MINIMUM_SIZE):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        path = scope.get("path", "")
+        if scope["type"] == "http" and path.startswith("/api/") and not path.startswith("/api/events/"):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
 
 app = FastAPI(
     title="ИПР - Индивидуальные планы развития",
     description="Веб-приложение для создания и управления ИПР сотрудников",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=UTF8ORJSONResponse
 )
 
 app.add_middleware(UTF8Middleware)
+app.add_middleware(APIGZipMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -59,37 +82,60 @@ app.include_router(task_routes.router)
 app.include_router(template_routes.router)
 app.include_router(comment_routes.router)
 app.include_router(user_routes.router)
+app.include_router(event_routes.router)
+app.include_router(metrics_routes.router)
+
+app.mount("/static", StaticAssets(directory="frontend/static"), name="static")
+# Байткод шаблонов кешируется на диске, холодный воркер не компилирует их заново
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR") or None
+templates = Jinja2Templates(
+    directory="frontend/templates",
+    bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR)
+)
+templates.env.globals["asset_url"] = asset_url
 
-app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
-templates = Jinja2Templates(directory="frontend/templates")
+# Страницы не зависят от пользователя: рендерим один раз и отдаём из памяти
+shells = ShellCache(templates)
+shells.register("login.html")
+shells.register("dashboard.html")
+shells.register("profile.html")
+shells.register("kanban.html", param="idp_id")
+shells.register("create_idp.html")
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+    return shells.response(request, "login.html")
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    return shells.response(request, "dashboard.html")
 
 @app.get("/profile", response_class=HTMLResponse)
 async def profile(request: Request):
-    return templates.TemplateResponse("profile.html", {"request": request})
+    return shells.response(request, "profile.html")
 
 @app.get("/kanban/{idp_id}", response_class=HTMLResponse)
 async def kanban(request: Request, idp_id: int):
-    return templates.TemplateResponse("kanban.html", {"request": request, "idp_id": idp_id})
+    return shells.response(request, "kanban.html", idp_id)
 
 @app.get("/create-idp", response_class=HTMLResponse)
 async def create_idp_page(request: Request):
-    return templates.TemplateResponse("create_idp.html", {"request": request})
+    return shells.response(request, "create_idp.html")
 
 @app.on_event("startup")
 def on_startup():
-    init_db()
-    print("✅ База данных инициализирована")
+    build_assets()
+    shells.render_all()
+    check_schema_version()
+    events.backend.start()
+    print("✅ Схема базы данных актуальна")
     print("🚀 Приложение запущено: http://localhost:8000")
     print("📚 API документация: http://localhost:8000/docs")
 
+@app.on_event("shutdown")
+def on_shutdown():
+    events.backend.stop()
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
 
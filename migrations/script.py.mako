@@ -0,0 +1,27 @@
+"""${message}
+
+Revision ID: ${up_revision}
+Revises: ${down_revision | comma,n}
+Create Date: ${create_date}
+
+Правила миграций для заполненной базы:
+- индексы: op.create_index(..., postgresql_concurrently=True) внутри
+  op.get_context().autocommit_block();
+- новые колонки: nullable или с константным server_default (без перезаписи таблицы),
+  заполнение существующих строк — отдельной миграцией пачками;
+- NOT NULL на существующей колонке: CHECK ... NOT VALID, затем VALIDATE CONSTRAINT.
+"""
+from alembic import op
+import sqlalchemy as sa
+${imports if imports else ""}
+
+revision = ${repr(up_revision)}
+down_revision = ${repr(down_revision)}
+branch_labels = ${repr(branch_labels)}
+depends_on = ${repr(depends_on)}
+
+def upgrade():
+    ${upgrades if upgrades else "pass"}
+
+def downgrade():
+    ${downgrades if downgrades else "pass"}
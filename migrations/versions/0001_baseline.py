@@ -0,0 +1,106 @@
+"""Исходная схема: то, что создавал Base.metadata.create_all до появления миграций
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+
+Базу, созданную через create_all до появления миграций, не пересоздаём:
+init_db() помечает её этой ревизией (alembic stamp) и применяет остальные.
+Поэтому ревизия повторяет исходные модели один в один, а все последующие
+изменения схемы лежат в отдельных ревизиях.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    user_role = sa.Enum("MENTOR", "MENTEE", name="userrole")
+    task_status = sa.Enum("TODO", "IN_PROGRESS", "DONE", name="taskstatus")
+    idp_status = sa.Enum("ACTIVE", "COMPLETED", "ARCHIVED", name="idpstatus")
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=True, unique=True),
+        sa.Column("password_hash", sa.String(), nullable=True),
+        sa.Column("role", user_role, nullable=False),
+        sa.Column("access_code", sa.String(), nullable=True, unique=True),
+        sa.Column("position", sa.String(), nullable=True),
+        sa.Column("grade", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "idps",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("mentor_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("mentee_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("status", idp_status, nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_idps_id", "idps", ["id"])
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("idp_id", sa.Integer(), sa.ForeignKey("idps.id"), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", task_status, nullable=True),
+        sa.Column("priority", sa.String(), nullable=True),
+        sa.Column("deadline", sa.DateTime(), nullable=True),
+        sa.Column("linked_skills", sa.JSON(), nullable=True),
+        sa.Column("checklist_state", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("token", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_sessions_id", "sessions", ["id"])
+    op.create_index("ix_sessions_token", "sessions", ["token"], unique=True)
+
+    op.create_table(
+        "task_templates",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("skill_name", sa.String(), nullable=False),
+        sa.Column("level", sa.Integer(), nullable=True),
+        sa.Column("goal", sa.Text(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("criteria", sa.Text(), nullable=True),
+        sa.Column("duration_weeks", sa.Integer(), nullable=True),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_task_templates_id", "task_templates", ["id"])
+    op.create_index("ix_task_templates_category", "task_templates", ["category"])
+
+    op.create_table(
+        "task_comments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("task_id", sa.Integer(), sa.ForeignKey("tasks.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("comment", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_task_comments_id", "task_comments", ["id"])
+
+def downgrade():
+    for table in ("task_comments", "task_templates", "sessions", "tasks", "idps", "users"):
+        op.drop_table(table)
+    for enum_name in ("idpstatus", "taskstatus", "userrole"):
+        sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
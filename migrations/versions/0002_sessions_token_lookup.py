@@ -0,0 +1,44 @@
+"""Поиск сессии по токену одним индексом
+
+Revision ID: 0002_sessions_token_lookup
+Revises: 0001_baseline
+Create Date: 2026-10-18
+
+Составной индекс (token, is_active, expires_at) отвечает на запрос сессии без
+чтения таблицы. Уникальность токена переезжает с индекса ix_sessions_token на
+ограничение sessions_token_key (как в модели): индекс строится CONCURRENTLY,
+ограничение навешивается на готовый индекс, старый индекс удаляется.
+"""
+from alembic import op
+
+revision = "0002_sessions_token_lookup"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_sessions_token_active_expires", "sessions", ["token", "is_active", "expires_at"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            "sessions_token_key", "sessions", ["token"], unique=True,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+    op.execute("ALTER TABLE sessions ADD CONSTRAINT sessions_token_key UNIQUE USING INDEX sessions_token_key")
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_sessions_token", table_name="sessions", postgresql_concurrently=True, if_exists=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_sessions_token", "sessions", ["token"], unique=True,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+    op.drop_constraint("sessions_token_key", "sessions", type_="unique")
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_sessions_token_active_expires", table_name="sessions",
+            postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,26 @@
+"""Версия каталога шаблонов
+
+Revision ID: 0003_catalog_version
+Revises: 0002_sessions_token_lookup
+Create Date: 2026-10-18
+
+Одна строка с номером версии каталога: по нему строится ETag снимка шаблонов.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_catalog_version"
+down_revision = "0002_sessions_token_lookup"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "catalog_version",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+def downgrade():
+    op.drop_table("catalog_version")
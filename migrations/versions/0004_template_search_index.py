@@ -0,0 +1,37 @@
+"""Полнотекстовый индекс шаблонов
+
+Revision ID: 0004_template_search_index
+Revises: 0003_catalog_version
+Create Date: 2026-10-18
+
+GIN-индекс по тому же выражению, что и TEMPLATE_SEARCH_VECTOR в моделях,
+иначе планировщик его не использует.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_template_search_index"
+down_revision = "0003_catalog_version"
+branch_labels = None
+depends_on = None
+
+TEMPLATE_SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(skill_name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(goal, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C')"
+)
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_task_templates_search", "task_templates",
+            [sa.text(f"({TEMPLATE_SEARCH_VECTOR})")], postgresql_using="gin",
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_task_templates_search", table_name="task_templates",
+            postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,43 @@
+"""Уникальный ключ шаблона для пакетной загрузки
+
+Revision ID: 0005_template_source_key
+Revises: 0004_template_search_index
+Create Date: 2026-10-18
+
+Загрузчик делает upsert по (source, category, skill_name, level). Повторы,
+оставшиеся от прежних загрузок, удаляются (остаётся самая поздняя запись),
+затем уникальный индекс строится CONCURRENTLY. level может быть NULL, а NULL в
+уникальном индексе различны, поэтому индекс — по coalesce(level, 0), и повторы
+ищутся по тому же выражению (строки с NULL тоже).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_template_source_key"
+down_revision = "0004_template_search_index"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.execute("""
+        DELETE FROM task_templates AS older
+        USING task_templates AS newer
+        WHERE older.source = newer.source
+          AND older.category = newer.category
+          AND older.skill_name = newer.skill_name
+          AND coalesce(older.level, 0) = coalesce(newer.level, 0)
+          AND older.id < newer.id
+    """)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "uq_task_templates_source_key", "task_templates",
+            ["source", "category", "skill_name", sa.text("coalesce(level, 0)")], unique=True,
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "uq_task_templates_source_key", table_name="task_templates",
+            postgresql_concurrently=True, if_exists=True
+        )
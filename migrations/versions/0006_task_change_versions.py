@@ -0,0 +1,40 @@
+"""Версии изменений задач и надгробия удалённых задач
+
+Revision ID: 0006_task_change_versions
+Revises: 0005_template_source_key
+Create Date: 2026-10-18
+
+Только изменения каталога, без перезаписи tasks: updated_at и version
+добавляются nullable, у version затем появляется DEFAULT nextval — он
+действует на новые строки. Существующие строки заполняет 0007 пачками.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_task_change_versions"
+down_revision = "0005_template_source_key"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.execute(sa.schema.CreateSequence(sa.Sequence("task_change_seq")))
+
+    op.add_column("tasks", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.add_column("tasks", sa.Column("version", sa.BigInteger(), nullable=True))
+    op.alter_column("tasks", "version", server_default=sa.text("nextval('task_change_seq')"))
+
+    op.create_table(
+        "task_tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("idp_id", sa.Integer(), sa.ForeignKey("idps.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_task_tombstones_idp_version", "task_tombstones", ["idp_id", "version"])
+
+def downgrade():
+    op.drop_table("task_tombstones")
+    op.drop_column("tasks", "version")
+    op.drop_column("tasks", "updated_at")
+    op.execute(sa.schema.DropSequence(sa.Sequence("task_change_seq")))
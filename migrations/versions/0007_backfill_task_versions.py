@@ -0,0 +1,53 @@
+"""Заполнение версий существующих задач
+
+Revision ID: 0007_backfill_task_versions
+Revises: 0006_task_change_versions
+Create Date: 2026-10-18
+
+Строки без версии обновляются пачками, каждая пачка — отдельная короткая
+транзакция. NOT NULL ставится через CHECK ... NOT VALID и VALIDATE: проверка
+идёт без блокировки записи, а SET NOT NULL по проверенному CHECK таблицу
+не сканирует. Индекс (idp_id, version) строится CONCURRENTLY.
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_backfill_task_versions"
+down_revision = "0006_task_change_versions"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "5000"))
+
+BACKFILL_BATCH = sa.text("""
+    UPDATE tasks
+    SET version = nextval('task_change_seq'),
+        updated_at = coalesce(updated_at, created_at)
+    WHERE id IN (
+        SELECT id FROM tasks WHERE version IS NULL ORDER BY id LIMIT :batch_size
+    )
+""")
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        while connection.execute(BACKFILL_BATCH, {"batch_size": BATCH_SIZE}).rowcount:
+            pass
+
+        # Каждый ALTER — своя транзакция: долгий VALIDATE не держит эксклюзивную блокировку
+        op.execute("ALTER TABLE tasks ADD CONSTRAINT tasks_version_not_null CHECK (version IS NOT NULL) NOT VALID")
+        op.execute("ALTER TABLE tasks VALIDATE CONSTRAINT tasks_version_not_null")
+        op.alter_column("tasks", "version", nullable=False)
+        op.drop_constraint("tasks_version_not_null", "tasks", type_="check")
+
+        op.create_index(
+            "ix_tasks_idp_version", "tasks", ["idp_id", "version"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tasks_idp_version", table_name="tasks", postgresql_concurrently=True, if_exists=True)
+    op.alter_column("tasks", "version", nullable=True)
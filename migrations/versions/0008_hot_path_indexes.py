@@ -0,0 +1,32 @@
+"""Составные индексы горячих фильтров
+
+Revision ID: 0008_hot_path_indexes
+Revises: 0007_backfill_task_versions
+Create Date: 2026-10-18
+
+Индексы строятся CONCURRENTLY вне транзакции: запись в таблицы не блокируется.
+"""
+from alembic import op
+
+revision = "0008_hot_path_indexes"
+down_revision = "0007_backfill_task_versions"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_users_email_role", "users", ["email", "role"]),
+    ("ix_users_access_code_role", "users", ["access_code", "role"]),
+    ("ix_idps_mentor_status", "idps", ["mentor_id", "status"]),
+    ("ix_idps_mentee_status", "idps", ["mentee_id", "status"]),
+    ("ix_task_comments_task_feed", "task_comments", ["task_id", "id"]),
+]
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,32 @@
+"""Индекс порядка карточек доски
+
+Revision ID: 0009_tasks_board_order
+Revises: 0008_hot_path_indexes
+Create Date: 2026-10-18
+
+Колонка доски (idp_id, status) читается одним диапазоном индекса уже в порядке
+приоритета и даты создания, включая постраничную догрузку по ключу.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_tasks_board_order"
+down_revision = "0008_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+TASK_PRIORITY_RANK = (
+    "CASE priority WHEN 'high' THEN 0 WHEN 'medium' THEN 1 WHEN 'low' THEN 2 ELSE 3 END"
+)
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_board_order", "tasks",
+            ["idp_id", "status", sa.text(f"({TASK_PRIORITY_RANK})"), "created_at", "id"],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tasks_board_order", table_name="tasks", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,124 @@
+"""Счётчики задач в ИПР
+
+Revision ID: 0010_idp_task_counters
+Revises: 0009_tasks_board_order
+Create Date: 2026-10-18
+
+Колонки с постоянным DEFAULT добавляются без перезаписи таблицы. Счётчики ведут
+триггеры уровня оператора на tasks: по таблицам переходов (old/new rows) они
+одним UPDATE idps применяют приращения к каждому затронутому ИПР. Затем
+существующие ИПР заполняются пачками: строки ИПР блокируются до подсчёта, так что
+записи, идущие параллельно с миграцией, не теряются и не учитываются дважды.
+Просрочка не хранится, для её подсчёта при чтении — частичный индекс.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_idp_task_counters"
+down_revision = "0009_tasks_board_order"
+branch_labels = None
+depends_on = None
+
+COUNTERS = ["total_tasks", "todo_tasks", "in_progress_tasks", "done_tasks"]
+BATCH_SIZE = 500
+
+APPLY_DELTA = """
+        UPDATE idps SET
+            total_tasks = idps.total_tasks + delta.total_tasks,
+            todo_tasks = idps.todo_tasks + delta.todo_tasks,
+            in_progress_tasks = idps.in_progress_tasks + delta.in_progress_tasks,
+            done_tasks = idps.done_tasks + delta.done_tasks,
+            last_activity_at = now() AT TIME ZONE 'utc'
+        FROM (
+            SELECT idp_id,
+                   sum(sign) AS total_tasks,
+                   sum(CASE WHEN status = 'TODO' THEN sign ELSE 0 END) AS todo_tasks,
+                   sum(CASE WHEN status = 'IN_PROGRESS' THEN sign ELSE 0 END) AS in_progress_tasks,
+                   sum(CASE WHEN status = 'DONE' THEN sign ELSE 0 END) AS done_tasks
+            FROM ({rows}) AS changed
+            GROUP BY idp_id
+        ) AS delta
+        WHERE idps.id = delta.idp_id;
+"""
+INSERTED = "SELECT idp_id, status, 1 AS sign FROM new_tasks"
+DELETED = "SELECT idp_id, status, -1 AS sign FROM old_tasks"
+
+COUNTERS_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION idp_task_counters() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+{APPLY_DELTA.format(rows=INSERTED)}
+    ELSIF TG_OP = 'UPDATE' THEN
+{APPLY_DELTA.format(rows=f"{INSERTED} UNION ALL {DELETED}")}
+    ELSE
+{APPLY_DELTA.format(rows=DELETED)}
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+TRIGGERS = {
+    "tasks_counters_insert": "INSERT ON tasks REFERENCING NEW TABLE AS new_tasks",
+    "tasks_counters_update": "UPDATE ON tasks REFERENCING OLD TABLE AS old_tasks NEW TABLE AS new_tasks",
+    "tasks_counters_delete": "DELETE ON tasks REFERENCING OLD TABLE AS old_tasks",
+}
+
+LOCK_BATCH = sa.text("SELECT id FROM idps WHERE id > :after_id ORDER BY id LIMIT :batch_size FOR UPDATE")
+BACKFILL_BATCH = sa.text("""
+    UPDATE idps SET
+        total_tasks = counts.total_tasks,
+        todo_tasks = counts.todo_tasks,
+        in_progress_tasks = counts.in_progress_tasks,
+        done_tasks = counts.done_tasks,
+        last_activity_at = coalesce(idps.last_activity_at, counts.last_activity_at, idps.created_at)
+    FROM (
+        SELECT idps.id AS idp_id,
+               count(tasks.id) AS total_tasks,
+               count(tasks.id) FILTER (WHERE tasks.status = 'TODO') AS todo_tasks,
+               count(tasks.id) FILTER (WHERE tasks.status = 'IN_PROGRESS') AS in_progress_tasks,
+               count(tasks.id) FILTER (WHERE tasks.status = 'DONE') AS done_tasks,
+               max(tasks.updated_at) AS last_activity_at
+        FROM idps LEFT OUTER JOIN tasks ON tasks.idp_id = idps.id
+        WHERE idps.id = ANY(:idp_ids)
+        GROUP BY idps.id
+    ) AS counts
+    WHERE idps.id = counts.idp_id
+""")
+
+def upgrade():
+    for name in COUNTERS:
+        op.add_column("idps", sa.Column(name, sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("idps", sa.Column("last_activity_at", sa.DateTime(), nullable=True))
+
+    op.execute(COUNTERS_FUNCTION)
+    for name, event in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} AFTER {event} FOR EACH STATEMENT EXECUTE FUNCTION idp_task_counters()")
+
+    with op.get_context().autocommit_block():
+        # Каждая пачка — своя транзакция на отдельном соединении: блокировка, затем подсчёт
+        engine = op.get_bind().engine
+        after_id = 0
+        while True:
+            with engine.begin() as connection:
+                idp_ids = connection.execute(LOCK_BATCH, {"after_id": after_id, "batch_size": BATCH_SIZE}).scalars().all()
+                if not idp_ids:
+                    break
+                connection.execute(BACKFILL_BATCH, {"idp_ids": idp_ids})
+            after_id = idp_ids[-1]
+
+        op.create_index(
+            "ix_tasks_idp_open_deadline", "tasks", ["idp_id", "deadline"],
+            postgresql_where=sa.text("status <> 'DONE'"),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tasks_idp_open_deadline", table_name="tasks", postgresql_concurrently=True, if_exists=True)
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS idp_task_counters()")
+    op.drop_column("idps", "last_activity_at")
+    for name in reversed(COUNTERS):
+        op.drop_column("idps", name)
@@ -0,0 +1,77 @@
+"""Версия изменений ИПР — безопасная отметка для /changes
+
+Revision ID: 0011_idp_change_version
+Revises: 0010_idp_task_counters
+Create Date: 2026-10-18
+
+Версии задач берутся из общей последовательности, но коммитятся не по порядку:
+запись с меньшей версией может стать видимой позже записи с большей, и клиент,
+запомнивший максимум, её пропустит. Поэтому версию выдаёт триггер BEFORE на
+tasks и task_tombstones под блокировкой строки ИПР: UPDATE idps SET
+change_version = nextval(...) RETURNING. Изменения одного ИПР получают версии
+строго в порядке коммитов, а закоммиченное idps.change_version — отметка, до
+которой клиент видел всё.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_idp_change_version"
+down_revision = "0010_idp_task_counters"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+CHANGE_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION idp_change_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE idps SET change_version = nextval('task_change_seq')
+    WHERE id = NEW.idp_id
+    RETURNING change_version INTO NEW.version;
+    RETURN NEW;
+END
+$$
+"""
+
+TRIGGERS = {
+    "tasks_change_version": "INSERT OR UPDATE ON tasks",
+    "task_tombstones_change_version": "INSERT ON task_tombstones",
+}
+
+LOCK_BATCH = sa.text("SELECT id FROM idps WHERE id > :after_id ORDER BY id LIMIT :batch_size FOR UPDATE")
+BACKFILL_BATCH = sa.text("""
+    UPDATE idps SET change_version = greatest(
+        idps.change_version,
+        (SELECT max(version) FROM tasks WHERE tasks.idp_id = idps.id),
+        (SELECT max(version) FROM task_tombstones WHERE task_tombstones.idp_id = idps.id)
+    )
+    WHERE idps.id = ANY(:idp_ids)
+""")
+
+def upgrade():
+    op.add_column("idps", sa.Column("change_version", sa.BigInteger(), nullable=False, server_default="0"))
+
+    op.execute(CHANGE_VERSION_FUNCTION)
+    for name, event in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} BEFORE {event} FOR EACH ROW EXECUTE FUNCTION idp_change_version()")
+    # Версию теперь всегда ставит триггер, DEFAULT лишь тратил бы значения последовательности
+    op.alter_column("tasks", "version", server_default=None)
+
+    with op.get_context().autocommit_block():
+        # Отметка не может уменьшиться: greatest() с тем, что уже выставил триггер
+        engine = op.get_bind().engine
+        after_id = 0
+        while True:
+            with engine.begin() as connection:
+                idp_ids = connection.execute(LOCK_BATCH, {"after_id": after_id, "batch_size": BATCH_SIZE}).scalars().all()
+                if not idp_ids:
+                    break
+                connection.execute(BACKFILL_BATCH, {"idp_ids": idp_ids})
+            after_id = idp_ids[-1]
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS task_tombstones_change_version ON task_tombstones")
+    op.execute("DROP TRIGGER IF EXISTS tasks_change_version ON tasks")
+    op.alter_column("tasks", "version", server_default=sa.text("nextval('task_change_seq')"))
+    op.execute("DROP FUNCTION IF EXISTS idp_change_version()")
+    op.drop_column("idps", "change_version")
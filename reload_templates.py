@@ -6,6 +6,7 @@
 
 from backend.database import SessionLocal, init_db
 from backend.models import TaskTemplate
+from backend.catalog import bump_catalog_version
 from load_task_templates import load_kb_tasks, load_hardskills
 from sqlalchemy import func
 
@@ -15,6 +16,7 @@ def clear_templates():
     db = SessionLocal()
     try:
         count = db.query(TaskTemplate).delete()
+        bump_catalog_version(db)
         db.commit()
         print(f"✅ Удалено {count} старых шаблонов")
     except Exception as e:
@@ -53,7 +55,10 @@ def main():
             func.count(TaskTemplate.id)
         ).group_by(TaskTemplate.source).all()
         
-        categories = db.query(TaskTemplate.category).distinct().all()
+        categories = db.query(
+            TaskTemplate.category,
+            func.count(TaskTemplate.id)
+        ).group_by(TaskTemplate.category).order_by(TaskTemplate.category).all()
         
         print("=" * 80)
         print("📊 РЕЗУЛЬТАТ")
@@ -67,8 +72,7 @@ def main():
         print(f"Категорий: {len(categories)}")
         print()
         print("Список категорий:")
-        for cat in sorted([c[0] for c in categories]):
-            count = db.query(TaskTemplate).filter(TaskTemplate.category == cat).count()
+        for cat, count in categories:
             print(f"  - {cat} ({count} задач)")
         
         print("=" * 80)
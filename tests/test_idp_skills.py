@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""Навыки ИПР для панели доски собираются по всем задачам, а не по загруженной странице"""
+from tests.conftest import create_idps
+
+def test_skills_cover_tasks_beyond_first_page(client, mentor):
+    [idp_id] = create_idps(client, mentor, 1, tasks_per_idp=0)
+    skills = ["SQL", "Python", "SQL", None, "API"]
+    for number, skill in enumerate(skills):
+        response = client.post("/api/tasks/", headers=mentor, json={
+            "idp_id": idp_id,
+            "title": f"Задача {number}",
+            "linked_skills": {"skill": skill, "level": 1} if skill else None
+        })
+        assert response.status_code == 200, response.text
+
+    first_page = client.get(f"/api/tasks/idp/{idp_id}?status=todo&limit=1", headers=mentor).json()
+    assert len(first_page) == 1
+
+    response = client.get(f"/api/tasks/idp/{idp_id}/skills", headers=mentor)
+    assert response.status_code == 200, response.text
+    assert response.json() == ["API", "Python", "SQL"]
+
+def test_skills_require_access_to_idp(client, mentor):
+    [idp_id] = create_idps(client, mentor, 1, tasks_per_idp=0)
+    response = client.get(f"/api/tasks/idp/{idp_id}/skills")
+    assert response.status_code == 401
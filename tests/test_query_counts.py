@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Число SQL-запросов на горячих маршрутах ИПР: верхняя граница и независимость от
+числа ИПР. Рост с N означает N+1 — ленивую загрузку связей в цикле.
+"""
+import uuid
+
+import pytest
+
+from tests.conftest import count_queries, create_idps
+
+IDP_COUNTS = [1, 5]
+
+# Маршрут -> допустимое число запросов при прогретом кэше сессий
+READ_LIMITS = {
+    "/api/idps/": 2,              # ИПР с ментором и менти одним JOIN + selectin задач
+    "/api/idps/mentees/list": 1,
+    "/api/idps/summary": 1,
+}
+
+@pytest.mark.parametrize("path", list(READ_LIMITS))
+@pytest.mark.parametrize("idp_count", IDP_COUNTS)
+def test_list_routes_query_count(client, mentor, path, idp_count):
+    create_idps(client, mentor, idp_count)
+
+    with count_queries() as counter:
+        response = client.get(path, headers=mentor)
+
+    assert response.status_code == 200, response.text
+    assert counter.count <= READ_LIMITS[path], counter.statements
+
+@pytest.mark.parametrize("idp_count", IDP_COUNTS)
+def test_get_idp_query_count(client, mentor, idp_count):
+    idp_ids = create_idps(client, mentor, idp_count)
+
+    for idp_id in idp_ids:
+        with count_queries() as counter:
+            response = client.get(f"/api/idps/{idp_id}", headers=mentor)
+
+        assert response.status_code == 200, response.text
+        assert len(response.json()["tasks"]) == 3
+        assert counter.count <= 2, counter.statements
+
+@pytest.mark.parametrize("idp_count", IDP_COUNTS)
+def test_create_idp_query_count(client, mentor, idp_count):
+    # Уже существующие ИПР ментора не должны влиять на стоимость создания
+    create_idps(client, mentor, idp_count)
+
+    with count_queries() as counter:
+        response = client.post("/api/idps/", headers=mentor, json={
+            "mentee_full_name": "Менти",
+            "mentee_email": f"mentee-{uuid.uuid4().hex[:12]}@test.local"
+        })
+
+    assert response.status_code == 200, response.text
+    # Поиск менти, INSERT менти и ИПР, перечитывание ИПР с задачами
+    assert counter.count <= 5, counter.statements
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Кэш сессий без БД: выключение для нескольких воркеров с бэкендом событий memory"""
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+from backend.session_cache import SessionCache
+
+def test_disabled_cache_never_serves_snapshot():
+    cache = SessionCache(max_size=10, ttl=60)
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    cache.put("token", {"id": 1}, expires_at)
+    assert cache.get("token") == {"id": 1}
+
+    cache.disable()
+    assert cache.get("token") is None
+    cache.put("token", {"id": 1}, expires_at)
+    assert cache.get("token") is None
+
+def check_cache_enabled(env) -> bool:
+    code = "from backend import events; print(events.session_cache.max_size > 0)"
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1] == "True"
+
+def test_memory_backend_with_several_workers_disables_cache():
+    env = {key: value for key, value in os.environ.items() if key not in ("EVENTS_BACKEND", "WEB_CONCURRENCY")}
+    assert check_cache_enabled(env)
+    assert not check_cache_enabled({**env, "WEB_CONCURRENCY": "4"})
+    assert check_cache_enabled({**env, "WEB_CONCURRENCY": "4", "EVENTS_BACKEND": "postgres"})